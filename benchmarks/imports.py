@@ -0,0 +1,71 @@
+from statistics import median
+import argparse
+import json
+import subprocess
+import sys
+
+TARGETS = [
+    'import eva',
+    'import eva.config',
+    'from eva.utils import normalize_ascii',
+    'from eva.utils import date_parse',
+    'from eva.utils import IOBReader',
+    'from eva.utils import parse',
+    'from eva.entities.tag import entity_dict',
+    'from eva.intents.classify import get_intent',
+    'from eva.responses import search',
+]
+
+HEAVY_MODULES = [
+    'sklearn', 'gensim', 'pycrfsuite', 'nltk', 'scipy', 'numpy', 'requests'
+]
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+%s
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'modules': sorted(m for m in %r if m in sys.modules),
+}))
+'''
+
+
+def measure(statement, repeat=5):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', PROBE % (statement, HEAVY_MODULES)]
+        )
+        runs.append(json.loads(output.decode('utf8').splitlines()[-1]))
+    return {
+        'statement': statement,
+        'median_seconds': median(r['seconds'] for r in runs),
+        'min_seconds': min(r['seconds'] for r in runs),
+        'heavy_modules': runs[-1]['modules'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Measure cold import time of the eva entry points.'
+    )
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('-o', '--output', help='JSON output file')
+    parser.add_argument('targets', nargs='*', default=TARGETS)
+    args = parser.parse_args(argv)
+
+    results = [measure(t, args.repeat) for t in args.targets]
+    for r in results:
+        print('%8.1f ms  %-45s %s' % (
+            r['median_seconds'] * 1000, r['statement'],
+            ','.join(r['heavy_modules'])
+        ))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'imports': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+from os.path import abspath
+from os.path import dirname
+from os.path import join
+from statistics import mean
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+BENCHMARKS = [
+    'parse', 'entity_dict', 'get_intent', 'similarities', 'iob_reader'
+]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+
+    def at(p):
+        return samples[min(int(p * len(samples)), len(samples) - 1)]
+
+    return {
+        'count': len(samples),
+        'mean': mean(samples),
+        'p50': at(0.5),
+        'p90': at(0.9),
+        'p99': at(0.99),
+        'max': samples[-1],
+    }
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    if hasattr(result, '__next__'):
+        list(result)
+    return time.perf_counter() - start
+
+
+def corpus_sentences(data_dir, limit, seed):
+    from eva.utils.reader import split_segments
+    from glob import glob
+    sents = []
+    for filename in sorted(glob(join(data_dir, '*.iob'))):
+        with open(filename, 'rb') as f:
+            for line in f:
+                text = ''.join(
+                    value for _, value in
+                    split_segments(line.decode('utf8'))
+                ).strip()
+                if text:
+                    sents.append(text)
+    random.Random(seed).shuffle(sents)
+    return sents[:limit]
+
+
+def synthetic_documents(words, size, seed):
+    generator = random.Random(seed)
+    return [
+        'PE ' + ' '.join(
+            generator.choice(words) for _ in range(generator.randint(3, 12))
+        )
+        for _ in range(size)
+    ]
+
+
+def bench_parse(args):
+    from eva.utils.parser import parse
+    sents = corpus_sentences(args.data, args.sentences, args.seed)
+    load = timed(parse, sents[0])
+    return {
+        'load_seconds': load,
+        'latency': percentiles([timed(parse, sent) for sent in sents]),
+    }
+
+
+def bench_entity_dict(args):
+    from eva.entities.tag import entity_dict
+    sents = corpus_sentences(args.data, args.sentences, args.seed)
+    load = timed(entity_dict, sents[0])
+    elapsed = timed(entity_dict, *sents)
+    return {
+        'load_seconds': load,
+        'sentences': len(sents),
+        'seconds': elapsed,
+        'sentences_per_second': len(sents) / elapsed,
+    }
+
+
+def bench_get_intent(args):
+    from eva.intents.classify import get_intent
+    sents = corpus_sentences(args.data, args.sentences, args.seed)
+    load = timed(get_intent, sents[0])
+    batches = {}
+    for size in args.batch_sizes:
+        chunks = [
+            sents[i:i + size] for i in range(0, len(sents), size)
+        ]
+        elapsed = sum(timed(get_intent, *chunk) for chunk in chunks)
+        batches[str(size)] = {
+            'seconds': elapsed,
+            'sentences_per_second': len(sents) / elapsed,
+        }
+    return {'load_seconds': load, 'batches': batches}
+
+
+def bench_similarities(args):
+    from eva.responses.train import LSIndexer
+    from eva.utils.text import regex_tokenize
+    sents = corpus_sentences(args.data, None, args.seed)
+    words = sorted({
+        word.lower() for sent in sents for word in regex_tokenize(sent)
+        if len(word) > 2
+    })
+    queries = random.Random(args.seed).sample(
+        sents, min(args.queries, len(sents))
+    )
+    sizes = {}
+    for size in args.sizes:
+        indexer = LSIndexer()
+        fit = timed(
+            indexer.fit, 'bench',
+            synthetic_documents(words, size, args.seed),
+            num_topics=args.num_topics
+        )
+        sizes[str(size)] = {
+            'fit_seconds': fit,
+            'latency': percentiles([
+                timed(indexer.similarities, 'bench', query)
+                for query in queries
+            ]),
+        }
+    return {'num_topics': args.num_topics, 'sizes': sizes}
+
+
+def bench_iob_reader(args):
+    from eva.utils.reader import IOBReader
+    reader = None
+    runs = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        reader = IOBReader(dirname=args.data)
+        runs.append(time.perf_counter() - start)
+    return {
+        'sentences': len(reader.sents),
+        'seconds': percentiles(runs),
+    }
+
+
+def run(name, args):
+    from eva import config
+    config.set_eva_path(args.eva_path)
+    result = globals()['bench_%s' % name](args)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    result['peak_rss_bytes'] = scale * resource.getrusage(
+        resource.RUSAGE_SELF
+    ).ru_maxrss
+    return result
+
+
+def commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+            stderr=subprocess.DEVNULL
+        ).decode('utf8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the eva models and write the results as JSON.'
+    )
+    parser.add_argument('benchmarks', nargs='*', default=BENCHMARKS)
+    parser.add_argument('-o', '--output', help='JSON output file')
+    parser.add_argument('--eva-path', default=ROOT)
+    parser.add_argument('--data', default=join(ROOT, 'data', 'iob'))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sentences', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--num-topics', type=int, default=200)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[1000, 10000, 50000]
+    )
+    parser.add_argument(
+        '--batch-sizes', type=int, nargs='+', default=[1, 16, 128]
+    )
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    if args.run:
+        print(json.dumps(run(args.run, args)))
+        return
+
+    results = {}
+    for name in args.benchmarks:
+        # a fresh interpreter per benchmark keeps load times and peak memory
+        # independent of whatever ran before it
+        output = subprocess.check_output(
+            [sys.executable, abspath(__file__), '--run', name] + argv,
+            cwd=ROOT
+        )
+        results[name] = json.loads(output.decode('utf8').splitlines()[-1])
+        print('%-14s peak %8.1f MB  %s' % (
+            name, results[name]['peak_rss_bytes'] / 2.0 ** 20,
+            json.dumps(results[name], sort_keys=True)[:120]
+        ))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'commit': commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'arguments': vars(args),
+                'benchmarks': results,
+            }, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +0,0 @@
-import locale
-
-locale.setlocale(locale.LC_ALL, 'pt_BR.utf8')
@@ -0,0 +1,196 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+
+__all__ = [
+    'AsyncEva', 'MicroBatcher'
+]
+
+
+def load_models(pos_model, iob_model, intent_model, index_model=None):
+    from eva.entities.tag import load_tagger
+    from eva.entities.train import IOBTagger
+    from eva.intents.classify import load_classifier
+    from nltk.tag import CRFTagger
+    load_tagger(pos_model, CRFTagger)
+    load_tagger(iob_model, IOBTagger)
+    load_classifier(model=intent_model)
+    if index_model:
+        from eva.responses.base import load_indexer
+        load_indexer(index_model)
+
+
+def run_parse(texts, pos_model, iob_model, intent_model):
+    from eva.utils.pipeline import Pipeline
+    pipeline = Pipeline(
+        pos_model=pos_model, iob_model=iob_model, intent_model=intent_model
+    )
+    return [doc.to_dict() for doc in pipeline(*texts)]
+
+
+def run_get_intent(texts, intent_model):
+    from eva.intents.classify import get_intent
+    return list(get_intent(*texts, model=intent_model))
+
+
+def run_entity_dict(texts, iob_model):
+    from eva.entities.tag import entity_dict
+    return list(entity_dict(*texts, model=iob_model))
+
+
+def run_search(texts, section, index_model):
+    from eva.responses.base import batch_search
+    return batch_search(section, texts, model=index_model)
+
+
+class MicroBatcher(object):
+
+    def __init__(self, fn, executor, window=0.005, max_batch=64):
+        self.fn = fn
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = []
+        self.handle = None
+
+    async def submit(self, item):
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self.pending.append((item, future))
+        if len(self.pending) >= self.max_batch:
+            self.flush(loop)
+        elif self.handle is None:
+            self.handle = loop.call_later(self.window, self.flush, loop)
+        return await future
+
+    def flush(self, loop):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        items, futures = zip(*batch)
+        task = loop.run_in_executor(self.executor, self.fn, list(items))
+        task.add_done_callback(partial(self.resolve, futures))
+
+    @staticmethod
+    def resolve(futures, task):
+        if task.cancelled():
+            for future in futures:
+                future.cancel()
+            return
+        error = task.exception()
+        results = [error] * len(futures) if error else task.result()
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def __repr__(self):
+        return '%s(fn=%r, window=%s, max_batch=%s, pending=%s)' % (
+            self.__class__.__name__,
+            self.fn,
+            self.window,
+            self.max_batch,
+            len(self.pending)
+        )
+
+
+class AsyncEva(object):
+
+    def __init__(self, *args, **kwargs):
+        self.pos_model = kwargs.pop('pos_model', 'pos.model')
+        self.iob_model = kwargs.pop('iob_model', 'iob.model')
+        self.intent_model = kwargs.pop('intent_model', 'intents.model')
+        self.index_model = kwargs.pop('index_model', None)
+        self.workers = kwargs.pop('workers', 4)
+        self.processes = kwargs.pop('processes', False)
+        self.window = kwargs.pop('window', 0.005)
+        self.max_batch = kwargs.pop('max_batch', 64)
+        self.executor = None
+        self.batchers = {}
+        super().__init__(*args, **kwargs)
+
+    @property
+    def models(self):
+        return (
+            self.pos_model, self.iob_model,
+            self.intent_model, self.index_model
+        )
+
+    async def start(self):
+        if self.executor is not None:
+            return self
+        loop = asyncio.get_event_loop()
+        # Load in the parent first so forked workers inherit the models
+        await loop.run_in_executor(None, partial(load_models, *self.models))
+        if self.processes:
+            self.executor = ProcessPoolExecutor(self.workers)
+            await asyncio.gather(*[
+                loop.run_in_executor(
+                    self.executor, partial(load_models, *self.models)
+                ) for _ in range(self.workers)
+            ])
+        else:
+            self.executor = ThreadPoolExecutor(self.workers)
+        return self
+
+    async def close(self):
+        if self.executor is not None:
+            for batcher in self.batchers.values():
+                batcher.flush(asyncio.get_event_loop())
+            self.executor.shutdown(wait=False)
+            self.executor = None
+            self.batchers = {}
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def batcher(self, key, fn):
+        if self.executor is None:
+            raise RuntimeError('Call start() before submitting requests.')
+        if key not in self.batchers:
+            self.batchers[key] = MicroBatcher(
+                fn, self.executor, self.window, self.max_batch
+            )
+        return self.batchers[key]
+
+    async def parse(self, text):
+        return await self.batcher('parse', partial(
+            run_parse, pos_model=self.pos_model, iob_model=self.iob_model,
+            intent_model=self.intent_model
+        )).submit(text)
+
+    async def get_intent(self, text):
+        return await self.batcher('intent', partial(
+            run_get_intent, intent_model=self.intent_model
+        )).submit(text)
+
+    async def entity_dict(self, text):
+        return await self.batcher('entities', partial(
+            run_entity_dict, iob_model=self.iob_model
+        )).submit(text)
+
+    async def search(self, section, text):
+        if not self.index_model:
+            raise ValueError('AsyncEva was created without an index_model.')
+        return await self.batcher(('search', section), partial(
+            run_search, section=section, index_model=self.index_model
+        )).submit(text)
+
+    def __repr__(self):
+        return '%s(workers=%s, processes=%s, window=%s, max_batch=%s)' % (
+            self.__class__.__name__,
+            self.workers,
+            self.processes,
+            self.window,
+            self.max_batch
+        )
@@ -0,0 +1,164 @@
+from collections import deque
+from eva.aio import load_models
+from eva.aio import run_parse
+from functools import partial
+from itertools import islice
+import argparse
+import gc
+import json
+import multiprocessing
+import queue
+import sys
+
+__all__ = [
+    'bulk_parse', 'read_texts', 'main'
+]
+
+
+def chunked(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_texts(lines, field=None):
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if field is None:
+            yield line
+        elif line.strip():
+            yield json.loads(line)[field]
+        else:  # keep indexes aligned with the input lines
+            yield ''
+
+
+def pool_context():
+    # forked workers share the preloaded models copy-on-write
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def _parse_chunk(args, **models):
+    start, texts = args
+    return start, run_parse(texts, **models)
+
+
+def bulk_parse(texts, processes=None, chunk_size=200, ordered=True,
+               max_pending=None, **kwargs):
+    models = {
+        'pos_model': kwargs.pop('pos_model', 'pos.model'),
+        'iob_model': kwargs.pop('iob_model', 'iob.model'),
+        'intent_model': kwargs.pop('intent_model', 'intents.model'),
+    }
+    load_models(**models)
+    worker = partial(_parse_chunk, **models)
+    jobs = (
+        (i * chunk_size, chunk)
+        for i, chunk in enumerate(chunked(texts, chunk_size))
+    )
+    if processes == 1:
+        for start, results in map(worker, jobs):
+            yield from enumerate(results, start)
+        return
+
+    context = pool_context()
+    frozen = hasattr(gc, 'freeze')
+    if frozen:  # keep the collector off the shared pages
+        gc.freeze()
+    processes = processes or context.cpu_count()
+    max_pending = max_pending or 2 * processes
+    done = queue.Queue()
+    pending = deque()
+    try:
+        with context.Pool(processes) as pool:
+            for job in jobs:
+                # bounded in-flight chunks keep memory flat on huge inputs
+                if len(pending) >= max_pending:
+                    yield from _collect(pending, done, ordered)
+                if ordered:
+                    pending.append(pool.apply_async(worker, (job,)))
+                else:
+                    pending.append(pool.apply_async(
+                        worker, (job,),
+                        callback=done.put, error_callback=done.put
+                    ))
+            while pending:
+                yield from _collect(pending, done, ordered)
+    finally:
+        if frozen:
+            gc.unfreeze()
+
+
+def _collect(pending, done, ordered):
+    if ordered:
+        start, results = pending.popleft().get()
+    else:
+        result = done.get()
+        if isinstance(result, BaseException):
+            raise result
+        start, results = result
+        pending.pop()
+    return enumerate(results, start)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Parse a large text or JSONL file with a process pool.'
+    )
+    parser.add_argument('input', nargs='?', default='-')
+    parser.add_argument('output', nargs='?', default='-')
+    parser.add_argument(
+        '-f', '--field', help='read JSONL input, taking the text from FIELD'
+    )
+    parser.add_argument('-j', '--processes', type=int)
+    parser.add_argument('-c', '--chunk-size', type=int, default=200)
+    parser.add_argument('-p', '--max-pending', type=int)
+    parser.add_argument(
+        '-u', '--unordered', action='store_true',
+        help='write results as they finish, tagged with the input line'
+    )
+    parser.add_argument('--eva-path')
+    parser.add_argument('--pos-model', default='pos.model')
+    parser.add_argument('--iob-model', default='iob.model')
+    parser.add_argument('--intent-model', default='intents.model')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.eva_path:
+        from eva import config
+        config.set_eva_path(args.eva_path)
+    source = sys.stdin if args.input == '-' else open(
+        args.input, encoding='utf8'
+    )
+    target = sys.stdout if args.output == '-' else open(
+        args.output, 'w', encoding='utf8'
+    )
+    try:
+        for index, result in bulk_parse(
+            read_texts(source, args.field),
+            processes=args.processes,
+            chunk_size=args.chunk_size,
+            ordered=not args.unordered,
+            max_pending=args.max_pending,
+            pos_model=args.pos_model,
+            iob_model=args.iob_model,
+            intent_model=args.intent_model
+        ):
+            if args.unordered:
+                result = dict(result, line=index)
+            target.write(json.dumps(result, ensure_ascii=False) + '\n')
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import glob
+import locale
 import os
-import requests
 import logging
 
 EVA_PATH = os.path.join(
@@ -15,7 +15,12 @@ def set_eva_path(path):
         EVA_PATH = path
 
 
+def set_locale(name='pt_BR.utf8'):
+    return locale.setlocale(locale.LC_ALL, name)
+
+
 def download(path=None):
+    import requests
     set_eva_path(path)
 
     logger = logging.getLogger(__name__)
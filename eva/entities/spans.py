@@ -0,0 +1,76 @@
+__all__ = [
+    'EntitySpans', 'iob_spans'
+]
+
+
+def iob_spans(labels):
+    types, starts, ends = [], [], []
+    for i, label in enumerate(labels):
+        if label == 'O':
+            continue
+        prefix, entity = label[:2], label[2:]
+        # same rules as nltk's conlltags2tree: a stray I- opens a new span
+        if prefix == 'I-' and ends and ends[-1] == i and \
+                types[-1] == entity:
+            ends[-1] = i + 1
+        elif prefix in ('B-', 'I-'):
+            types.append(entity)
+            starts.append(i)
+            ends.append(i + 1)
+        else:
+            raise ValueError('Bad conll tag %r' % (label,))
+    return types, starts, ends
+
+
+class EntitySpans(object):
+
+    __slots__ = ('tokens', 'types', 'starts', 'ends')
+
+    def __init__(self, tokens, types=(), starts=(), ends=()):
+        self.tokens = tokens
+        self.types = types
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_iob(cls, iob):
+        return cls(
+            [w for w, _, _ in iob], *iob_spans([i for _, _, i in iob])
+        )
+
+    def value(self, i):
+        return ' '.join(self.tokens[self.starts[i]:self.ends[i]])
+
+    def __len__(self):
+        return len(self.types)
+
+    def __iter__(self):
+        for i, entity in enumerate(self.types):
+            yield entity, self.value(i)
+
+    def to_list(self):
+        return [
+            {'type': entity, 'value': value}
+            for entity, value in self
+        ]
+
+    def to_compact(self):
+        return {
+            'tokens': self.tokens,
+            'spans': [
+                [entity, start, end] for entity, start, end in zip(
+                    self.types, self.starts, self.ends
+                )
+            ],
+        }
+
+    def __eq__(self, other):
+        return isinstance(other, EntitySpans) and \
+            self.to_compact() == other.to_compact()
+
+    def __repr__(self):
+        return '%s(tokens=%s, entities=%s)' % (
+            self.__class__.__name__,
+            len(self.tokens),
+            len(self)
+        )
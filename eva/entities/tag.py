@@ -1,54 +1,100 @@
-from boltons.cacheutils import LRI
-from eva.config import EVA_PATH
+from eva import instrument
+from eva.entities.spans import EntitySpans
 from eva.entities.train import IOBTagger
-from nltk import Tree
+from eva.registry import model_path
+from eva.registry import registry
+from itertools import chain
+from multiprocessing import Pool
 from nltk.chunk import conlltags2tree
 from nltk.tag import CRFTagger
 from nltk.tokenize import word_tokenize
-from os.path import join
-import os
+import threading
 
 __all__ = [
-    'pos_tag', 'iob_tag', 'ne_chunk', 'entity_dict'
+    'pos_tag', 'iob_tag', 'ne_chunk', 'entity_dict',
+    'pos_tag_tokens', 'iob_tag_pos', 'batch_tag',
+    'load_tagger', 'entity_spans'
 ]
 
-cache = LRI(max_size=2)
 
+def load_tagger(model_file, tagger_model):
 
-def __cached_tagger(model_file, cache_key, tagger_model):
-    if cache_key not in cache:
+    def loader(path):
         tagger = tagger_model()
-        tagger.set_model_file(
-            os.path.join(
-                os.getcwd(), join(EVA_PATH, 'models', model_file)
-            )
-        )
-        cache.update({
-            cache_key: tagger
-        })
-    return cache[cache_key]
+        tagger.set_model_file(path)
+        tagger.lock = threading.Lock()
+        return tagger
 
+    return registry.get(model_path(model_file), loader)
 
+
+def _extract_features(tagger, sents):
+    if isinstance(tagger, IOBTagger):
+        return [tagger.sentence_features(tokens) for tokens in sents]
+    return [
+        [tagger._feature_func(tokens, i) for i in range(len(tokens))]
+        for tokens in sents
+    ]
+
+
+def _pooled_features(args):
+    tagger_model, sents = args
+    return _extract_features(tagger_model(), sents)
+
+
+def batch_tag(tagger, sents, processes=None, chunk_size=500):
+    sents = list(sents)
+    if processes and len(sents) > chunk_size:
+        chunks = [
+            (tagger.__class__, sents[i:i + chunk_size])
+            for i in range(0, len(sents), chunk_size)
+        ]
+        with Pool(processes) as pool:
+            features = list(chain.from_iterable(
+                pool.map(_pooled_features, chunks)
+            ))
+    else:
+        features = _extract_features(tagger, sents)
+    crf = tagger._tagger
+    with getattr(tagger, 'lock', None) or threading.Lock():
+        return [
+            list(zip(tokens, crf.tag(sent_features))) if tokens else []
+            for tokens, sent_features in zip(sents, features)
+        ]
+
+
+@instrument.timed('pos_tagging')
+def pos_tag_tokens(*sents, **kwargs):
+    tagger = load_tagger(
+        kwargs.pop('model', 'pos.model'), CRFTagger
+    )
+    return batch_tag(tagger, sents, **kwargs)
+
+
+@instrument.timed('pos_tag')
 def pos_tag(*sents, **kwargs):
-    tagger = __cached_tagger(
-        kwargs.pop('model', 'pos.model'),
-        'pos_tag', CRFTagger
+    with instrument.timer('tokenize'):
+        tokens = [word_tokenize(sent) for sent in sents]
+    return pos_tag_tokens(*tokens, **kwargs)
+
+
+@instrument.timed('iob_tagging')
+def iob_tag_pos(*sents, **kwargs):
+    tagger = load_tagger(
+        kwargs.pop('model', 'iob.model'), IOBTagger
     )
     return [
-        tagger.tag(word_tokenize(sent))
-        for sent in sents
+        [(w, p, i) for (w, p), i in sent]
+        for sent in batch_tag(tagger, sents, **kwargs)
     ]
 
 
+@instrument.timed('iob_tag')
 def iob_tag(*sents, **kwargs):
-    tagger = __cached_tagger(
-        kwargs.pop('model', 'iob.model'),
-        'iob_tag', IOBTagger
+    model = kwargs.pop('model', 'iob.model')
+    return iob_tag_pos(
+        *pos_tag(*sents, **kwargs), model=model, **kwargs
     )
-    return [
-        [(w, p, i) for (w, p), i in tagger.tag(sent)]
-        for sent in pos_tag(*sents)
-    ]
 
 
 def ne_chunk(*sents, **kwargs):
@@ -57,15 +103,10 @@ def ne_chunk(*sents, **kwargs):
     ]
 
 
+def entity_spans(*sents, **kwargs):
+    return [EntitySpans.from_iob(iob) for iob in iob_tag(*sents, **kwargs)]
+
+
 def entity_dict(*sents, **kwargs):
-    for tree in ne_chunk(*sents, **kwargs):
-        entities = []
-        for branch in tree:
-            if isinstance(branch, Tree):
-                entities.append({
-                    'type': branch.label(),
-                    'value': ' '.join([
-                        x for x, _ in branch.leaves()
-                    ])
-                })
-        yield entities
+    for spans in entity_spans(*sents, **kwargs):
+        yield spans.to_list()
@@ -7,16 +7,56 @@ __all__ = [
 
 class IOBTagger(CRFTagger):
 
+    pos_labels = {
+        'ART': 'ARTIGO',
+        'PREP+ART': 'ARTIGO',
+        'V': 'VERBO',
+        'NPROP': 'NOME_PROPRIO',
+        'PU': 'PONTUACAO'
+    }
+    article_tags = ('ART', 'PREP+ART')
+
+    def _sentence_context(self, tokens):
+        tags_since_art = []
+        tags = set()
+        since = ''
+        for word, pos in tokens:
+            tags_since_art.append(since)
+            if pos in self.article_tags:
+                tags = set()
+                since = ''
+            elif pos not in tags:
+                tags.add(pos)
+                since = '+'.join(sorted(tags))
+
+        word_list = [x[0] for x in tokens]
+        pos_list = [x[1] for x in tokens]
+        return {
+            'tags_since_art': tags_since_art,
+            'most_used_word': max(set(word_list), key=word_list.count),
+            'most_used_pos': max(set(pos_list), key=pos_list.count),
+        }
+
+    def sentence_features(self, tokens):
+        if not tokens or not all(isinstance(t, tuple) for t in tokens):
+            return [self._get_features(tokens, i) for i in range(len(tokens))]
+        context = self._sentence_context(tokens)
+        return [
+            self._token_features(tokens, i, context)
+            for i in range(len(tokens))
+        ]
+
     def _get_features(self, tokens, i):
+        if not isinstance(tokens[i], tuple):
+            return []
+        # one tuple, read and replaced atomically, so threads sharing the
+        # tagger never pair a sentence with another sentence's context
+        cached = getattr(self, '_context', None)
+        if cached is None or cached[0] is not tokens:
+            cached = self._context = (tokens, self._sentence_context(tokens))
+        return self._token_features(tokens, i, cached[1])
 
-        def tags_since(sentence, i, *pos_list):
-            tags = set()
-            for word, pos in sentence[:i]:
-                if pos in pos_list:
-                    tags = set()
-                else:
-                    tags.add(pos)
-            return '+'.join(sorted(tags))
+    def _token_features(self, tokens, i, context):
 
         def tag_suffixes(length, features):
             if len(word) > length:
@@ -43,13 +83,9 @@ class IOBTagger(CRFTagger):
                         nextword[-length:]
                     ))
 
-        token = tokens[i]
         feature_list = []
 
-        if not isinstance(token, tuple):
-            return feature_list
-
-        word, pos = token
+        word, pos = tokens[i]
         prevword = tokens[i - 1][0] if i else None
         nextword = tokens[i + 1][0] if i != len(tokens) - 1 else None
         prevpos = tokens[i - 1][1] if i else '<START>'
@@ -62,21 +98,10 @@ class IOBTagger(CRFTagger):
         if word[0].isupper():
             feature_list.append('CAPITALIZATION')
 
-        pos_tags = {
-            'ART': 'ARTIGO',
-            'PREP+ART': 'ARTIGO',
-            'V': 'VERBO',
-            'NPROP': 'NOME_PROPRIO',
-            'PU': 'PONTUACAO'
-        }
-
         if 'PREP' in pos and pos != 'PREP+ART':
             feature_list.append('PREPOSICAO')
-        else:
-            for tag, label in pos_tags.items():
-                if pos == tag:
-                    feature_list.append(label)
-                    break
+        elif pos in self.pos_labels:
+            feature_list.append(self.pos_labels[pos])
 
         if word.isdigit():
             feature_list.append('IS_NUMBER')
@@ -86,15 +111,13 @@ class IOBTagger(CRFTagger):
         if '/' in word:
             feature_list.append('HAS_DASH')
 
-        tags_since_art = tags_since(tokens, i, 'ART', 'PREP+ART')
+        tags_since_art = context['tags_since_art'][i]
         if tags_since_art:
             feature_list.append('TAGS-SINCE-ART_%s' % tags_since_art)
 
-        word_list = [x[0] for x in tokens]
-        pos_list = [x[1] for x in tokens]
-        if max(set(word_list), key=word_list.count) == word:
+        if context['most_used_word'] == word:
             feature_list.append('MOST-USED-WORD')
-        if max(set(pos_list), key=pos_list.count) == pos:
+        if context['most_used_pos'] == pos:
             feature_list.append('MOST-USED-POS')
 
         feature_list.extend([
@@ -0,0 +1,214 @@
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+import logging
+
+__all__ = [
+    'enable', 'disable', 'enabled', 'timer', 'timed', 'count', 'observe',
+    'Histogram', 'MemorySink', 'LoggingSink', 'PrometheusSink'
+]
+
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+sinks = []
+
+
+class Histogram(object):
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': [
+                ['+Inf' if b == float('inf') else b, c]
+                for b, c in self.cumulative()
+            ],
+        }
+
+    def __repr__(self):
+        return '%s(count=%s, sum=%.6f)' % (
+            self.__class__.__name__, self.count, self.sum
+        )
+
+
+class MemorySink(object):
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.counters = {}
+        self.lock = Lock()
+
+    def observe(self, name, seconds):
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram(self.buckets)
+            self.histograms[name].observe(seconds)
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'timers': {
+                    name: histogram.to_dict()
+                    for name, histogram in self.histograms.items()
+                },
+                'counters': dict(self.counters),
+            }
+
+    def __repr__(self):
+        return '%s(timers=%s, counters=%s)' % (
+            self.__class__.__name__,
+            len(self.histograms),
+            len(self.counters)
+        )
+
+
+class PrometheusSink(MemorySink):
+
+    def __init__(self, namespace='eva', buckets=BUCKETS):
+        super().__init__(buckets)
+        self.namespace = namespace
+
+    def render(self):
+        snapshot = self.snapshot()
+        name = '%s_stage_seconds' % self.namespace
+        lines = ['# TYPE %s histogram' % name]
+        for stage, histogram in sorted(snapshot['timers'].items()):
+            for bound, count in histogram['buckets']:
+                lines.append('%s_bucket{stage="%s",le="%s"} %s' % (
+                    name, stage, bound, count
+                ))
+            lines.append('%s_sum{stage="%s"} %r' % (
+                name, stage, histogram['sum']
+            ))
+            lines.append('%s_count{stage="%s"} %s' % (
+                name, stage, histogram['count']
+            ))
+        name = '%s_events_total' % self.namespace
+        lines.append('# TYPE %s counter' % name)
+        for event, value in sorted(snapshot['counters'].items()):
+            lines.append('%s{event="%s"} %s' % (name, event, value))
+        return '\n'.join(lines) + '\n'
+
+
+class LoggingSink(object):
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger('eva.instrument')
+        self.level = level
+
+    def observe(self, name, seconds):
+        self.logger.log(self.level, '%s took %.6fs', name, seconds)
+
+    def increment(self, name, value=1):
+        self.logger.log(self.level, '%s +%s', name, value)
+
+    def __repr__(self):
+        return '%s(logger=%r)' % (self.__class__.__name__, self.logger.name)
+
+
+def enable(*new_sinks):
+    sinks[:] = new_sinks or [MemorySink()]
+    return sinks[0]
+
+
+def disable():
+    del sinks[:]
+
+
+def enabled():
+    return bool(sinks)
+
+
+def observe(name, seconds):
+    for sink in sinks:
+        sink.observe(name, seconds)
+
+
+def count(name, value=1):
+    for sink in sinks:
+        sink.increment(name, value)
+
+
+class Timer(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, perf_counter() - self.start)
+
+
+class NullTimer(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+null_timer = NullTimer()
+
+
+def timer(name):
+    if not sinks:
+        return null_timer
+    return Timer(name)
+
+
+def timed(name, method=False):
+
+    def decorator(fn):
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not sinks:
+                return fn(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(
+                    '%s.%s' % (args[0].__class__.__name__.lower(), name)
+                    if method else name,
+                    perf_counter() - start
+                )
+
+        return wrapper
+
+    return decorator
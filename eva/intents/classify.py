@@ -1,18 +1,28 @@
-from boltons.cacheutils import LRI
+from eva import instrument
+from eva.registry import model_path
+from eva.registry import registry
 
 __all__ = [
-    'get_intent'
+    'get_intent', 'get_intent_scores', 'load_classifier'
 ]
 
-cache = LRI(max_size=1)
 
+def load_classifier(**kwargs):
 
-def get_intent(*sents, **kwargs):
-    if 'intent' not in cache:
+    def loader(path):
         from eva.intents.train import IntentClassifier
-        model_file = kwargs.pop(
-            'model', 'intents.model'
-        )
-        classifier = IntentClassifier()
-        cache['intent'] = classifier.load(model_file)
-    return cache['intent'].predict(sents)
+        return IntentClassifier().load(path)
+
+    return registry.get(
+        model_path(kwargs.pop('model', 'intents.model')), loader
+    )
+
+
+@instrument.timed('get_intent')
+def get_intent(*sents, **kwargs):
+    return load_classifier(**kwargs).predict(sents)
+
+
+def get_intent_scores(*sents, **kwargs):
+    limit = kwargs.pop('limit', None)
+    return load_classifier(**kwargs).predict_scores(sents, limit)
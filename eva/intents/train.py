@@ -1,12 +1,14 @@
+from boltons.cacheutils import LRU
+from eva import instrument
 from eva.utils import IOBReader
 from eva.utils.mixins import SerializeMixin
+from eva.utils.normalizer import Normalizer
 from functools import partialmethod
-from nltk import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import SnowballStemmer
 from sklearn import metrics
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.svm import LinearSVC
+import numpy as np
+import scipy.sparse as sp
 
 __all__ = [
     'IntentClassifier'
@@ -15,41 +17,165 @@ __all__ = [
 
 class IntentClassifier(SerializeMixin, LinearSVC):
 
+    column_cache_size = 10000
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop('_columns', None)
+        return state
+
     def fit(self, **kwargs):
         reader = IOBReader(
-            kwargs.pop('path', 'data/iob'),
+            dirname=kwargs.pop('path', 'data/iob'),
+            processes=kwargs.pop('processes', None),
+            cache_dir=kwargs.pop('cache_dir', None),
             test_size=kwargs.pop('test_size', 0.2),
-            random_state=kwargs.pop('random_state', 42)
+            random_state=kwargs.pop('random_state', 42),
+            stream=kwargs.pop('stream', False)
         )
-        self.train_features, self.train_labels = zip(*reader.train_set)
-        self.test_features, self.test_labels = zip(*reader.test_set)
+        if reader.stream:
+            # stem while reading, the raw training texts are never held
+            documents, self.train_labels = [], []
+            for text, label in reader.iter_train_set():
+                documents.extend(self.stem_features([text]))  # STEMMING
+                self.train_labels.append(label)
+            self.test_features, self.test_labels = zip(
+                *reader.iter_test_set()
+            )
+        else:
+            self.train_features, self.train_labels = zip(*reader.train_set)
+            self.test_features, self.test_labels = zip(*reader.test_set)
+            documents = self.stem_features(self.train_features)  # STEMMING
         # TF-IDF
         self.tfidf = TfidfVectorizer()
-        train_tfidf = self.tfidf.fit_transform(
-            self.stem_features(self.train_features)  # STEMMING
-        )
+        train_tfidf = self.tfidf.fit_transform(documents)
         return super().fit(train_tfidf, self.train_labels)
 
+    def normalizer(self):
+        stemmer = getattr(self, 'stemmer', None)
+        if not isinstance(stemmer, Normalizer):
+            self.stemmer = Normalizer.from_stemmer(stemmer)
+        return self.stemmer
+
+    def stem_tokens(self, tokens):
+        return self.normalizer().stem_tokens(tokens)
+
     def stem_features(self, features):
-        if not hasattr(self, 'stemmer'):
-            self.stemmer = SnowballStemmer(language='portuguese')
-            self.stemmer.stopwords = set(stopwords.words('portuguese'))
         return [
-            ' '.join(
-                self.stemmer.stem(x) for x in word_tokenize(f)
-                if x not in self.stemmer.stopwords
-            ) for f in features
+            ' '.join(stems)
+            for stems in self.normalizer().batch_stem(features)
         ]
 
-    def predict(self, features):
+    def _token_columns(self, token):
+        vocabulary = self.tfidf.vocabulary_
+        if token in vocabulary:
+            return (vocabulary[token],)
+        # the analyzer may still fold or split tokens it was not fit on
+        return tuple(
+            vocabulary[x] for x in self.tfidf.build_analyzer()(token)
+            if x in vocabulary
+        )
+
+    def columns(self):
+        if getattr(self, '_columns', None) is None:
+            self._columns = LRU(
+                max_size=self.column_cache_size,
+                on_miss=self._token_columns
+            )
+        return self._columns
+
+    @instrument.timed('intent_vectorize')
+    def vectorize_stems(self, stems):
         if not hasattr(self, 'tfidf'):
             raise AttributeError(
                 'The model must be trained with fit() first.'
             )
-        features = self.tfidf.transform(
-            self.stem_features(features)
+        tfidf = self.tfidf
+        if tfidf.analyzer != 'word' or tuple(tfidf.ngram_range) != (1, 1):
+            return tfidf.transform([' '.join(s) for s in stems])
+        columns = self.columns()
+        indices = []
+        indptr = [0]
+        for tokens in stems:
+            for token in tokens:
+                indices.extend(columns[token])
+            indptr.append(len(indices))
+        counts = sp.csr_matrix((
+            np.ones(len(indices), dtype=tfidf.dtype),
+            np.asarray(indices, dtype=np.int32),
+            np.asarray(indptr, dtype=np.int32)
+        ), shape=(len(stems), len(tfidf.vocabulary_)))
+        counts.sum_duplicates()
+        if tfidf.binary:
+            counts.data.fill(1)
+        return tfidf._tfidf.transform(counts, copy=False)
+
+    def score_stems(self, stems):
+        features = self.vectorize_stems(stems)
+        with instrument.timer('intent_predict'):
+            scores = self.decision_function(features)
+        if scores.ndim == 1:
+            scores = np.column_stack([-scores, scores])
+        return scores
+
+    def predict_stems(self, stems):
+        return self.classes_[np.argmax(self.score_stems(stems), axis=1)]
+
+    def predict(self, features):
+        return self.predict_stems(self.normalizer().batch_stem(features))
+
+    def top_k(self, scores, limit=None):
+        order = np.argsort(-scores, axis=1, kind='mergesort')[:, :limit]
+        labels = self.classes_.tolist()
+        return [
+            [(labels[i], float(row[i])) for i in ranking]
+            for row, ranking in zip(scores, order)
+        ]
+
+    def predict_stem_scores(self, stems, limit=None):
+        return self.top_k(self.score_stems(stems), limit)
+
+    def predict_scores(self, features, limit=None):
+        return self.predict_stem_scores(
+            self.normalizer().batch_stem(features), limit
         )
-        return super().predict(features)
+
+    def export_state(self):
+        state = super().export_state()
+        tfidf = state.pop('tfidf', None)
+        if tfidf is not None:
+            params = tfidf.get_params()
+            params['dtype'] = np.dtype(params['dtype']).name
+            state['tfidf_params'] = params
+            state['tfidf_vocabulary'] = tfidf.vocabulary_
+            state['tfidf_idf'] = np.asarray(tfidf.idf_)
+        state.pop('_columns', None)
+        stemmer = state.pop('stemmer', None)
+        if stemmer is not None:
+            state['stopwords'] = sorted(stemmer.stopwords)
+        if 'classes_' in state:
+            state['classes_'] = np.asarray(state['classes_']).astype(str)
+        return state
+
+    def import_state(self, state):
+        params = state.pop('tfidf_params', None)
+        if params is not None:
+            params['dtype'] = np.dtype(params['dtype']).type
+            tfidf = TfidfVectorizer(**params)
+            tfidf.vocabulary_ = state.pop('tfidf_vocabulary')
+            tfidf.fixed_vocabulary_ = False
+            idf = np.asarray(state.pop('tfidf_idf'))
+            try:
+                tfidf.idf_ = idf
+            except AttributeError:  # scikit-learn < 0.20
+                tfidf._tfidf._idf_diag = sp.spdiags(
+                    idf, diags=0, m=len(idf), n=len(idf)
+                )
+            state['tfidf'] = tfidf
+        stopwords = state.pop('stopwords', None)
+        if stopwords is not None:
+            state['stemmer'] = Normalizer(stopwords)
+        super().import_state(state)
 
     def _get_evaluations(self, fn, feature_set=None):
         if feature_set:
@@ -77,6 +203,6 @@ class IntentClassifier(SerializeMixin, LinearSVC):
         return '%s(accuracy=%s, features=%s, labels=%s)' % (
             self.__class__.__name__,
             self.accuracy(),
-            len(self.train_features) + len(self.test_features),
+            len(self.train_labels) + len(self.test_labels),
             len(self.classes_)
         )
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from eva import config
+from eva import instrument
+from eva.utils.storage import META_FILE
+from os.path import join
+import os
+import threading
+
+__all__ = [
+    'ModelRegistry', 'registry', 'model_path'
+]
+
+
+def model_path(name):
+    return os.path.abspath(join(config.EVA_PATH, 'models', name))
+
+
+class ModelEntry(object):
+
+    def __init__(self, path, stamp, model, size):
+        self.path = path
+        self.stamp = stamp
+        self.model = model
+        self.size = size
+
+    def __repr__(self):
+        return '%s(path=\'%s\', size=%s)' % (
+            self.__class__.__name__,
+            self.path,
+            self.size
+        )
+
+
+class ModelRegistry(object):
+
+    def __init__(self, max_size=8, max_bytes=None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.RLock()
+        self.loading = {}
+
+    def configure(self, **kwargs):
+        with self.lock:
+            self.max_size = kwargs.pop('max_size', self.max_size)
+            self.max_bytes = kwargs.pop('max_bytes', self.max_bytes)
+            self._shrink()
+        return self
+
+    def stamp(self, path):
+        # exports write the top-level meta.json last, so it marks when a
+        # directory model is complete
+        if os.path.isdir(path):
+            path = join(path, META_FILE)
+        try:
+            stat = os.stat(path)
+        except OSError:  # briefly missing during a non-atomic deploy
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def footprint(self, path):
+        if not os.path.isdir(path):
+            return os.stat(path).st_size
+        return sum(
+            os.stat(join(root, name)).st_size
+            for root, _, files in os.walk(path) for name in files
+        )
+
+    def _cached(self, path, stamp):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or stamp not in (None, entry.stamp):
+                return None
+            self.entries.move_to_end(path)
+            return entry
+
+    def get(self, path, loader):
+        path = os.path.abspath(path)
+        stamp = self.stamp(path)
+        entry = self._cached(path, stamp)
+        if entry is not None:
+            return entry.model
+        with self.lock:
+            lock = self.loading.setdefault(path, threading.Lock())
+        # only lookups of the same path wait for the load
+        with lock:
+            entry = self._cached(path, stamp)
+            if entry is not None:
+                return entry.model
+            with instrument.timer('model_load'):
+                model = loader(path)
+            instrument.count('model_load')
+            entry = ModelEntry(path, stamp, model, self.footprint(path))
+            with self.lock:
+                self.entries[path] = entry
+                self.entries.move_to_end(path)
+                self._shrink(keep=path)
+                self.loading.pop(path, None)
+        return model
+
+    def warm_up(self, *models):
+        return [self.get(path, loader) for path, loader in models]
+
+    def keys(self, path):
+        # taggers and the classifier are stored by model name under
+        # EVA_PATH/models, indexers by their path from the working directory
+        return {os.path.abspath(path), model_path(path)}
+
+    def evict(self, path=None):
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+            else:
+                for key in self.keys(path):
+                    self.entries.pop(key, None)
+
+    def _shrink(self, keep=None):
+        while self.entries:
+            too_many = self.max_size is not None and \
+                len(self.entries) > self.max_size
+            too_big = self.max_bytes is not None and \
+                self.nbytes > self.max_bytes
+            if not (too_many or too_big):
+                break
+            oldest = next(iter(self.entries))
+            if oldest == keep:
+                break
+            self.entries.pop(oldest)
+
+    @property
+    def nbytes(self):
+        return sum(e.size for e in self.entries.values())
+
+    def __contains__(self, path):
+        return any(key in self.entries for key in self.keys(path))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return '%s(models=%s, max_size=%s, max_bytes=%s)' % (
+            self.__class__.__name__,
+            len(self.entries),
+            self.max_size,
+            self.max_bytes
+        )
+
+
+registry = ModelRegistry()
@@ -1,6 +1,12 @@
+from .base import batch_match
+from .base import batch_search
+from .base import batch_similarities
 from .base import match
 from .base import search
 from .base import similarities
 
 
-__all__ = ['search', 'match', 'similarities']
+__all__ = [
+    'search', 'match', 'similarities',
+    'batch_search', 'batch_match', 'batch_similarities'
+]
@@ -1,30 +1,41 @@
-from boltons.cacheutils import LRI
+from eva.registry import registry
 from eva.responses.train import LSIndexer
 
-cache = LRI(max_size=1)
+__all__ = [
+    'search', 'match', 'similarities',
+    'batch_search', 'batch_match', 'batch_similarities', 'load_indexer'
+]
 
 
-def __cached_indexer(**kwargs):
-    if 'indexer' not in cache:
-        indexer = LSIndexer()
-        cache.update({
-            'indexer': indexer.load(
-                kwargs.pop('model', 'index.lsi')
-            )
-        })
-    return cache['indexer']
+def load_indexer(model='index.lsi'):
+    return registry.get(model, lambda path: LSIndexer().load(path))
 
 
 def search(section, text, **kwargs):
-    indexer = __cached_indexer(**kwargs)
+    indexer = load_indexer(kwargs.pop('model', 'index.lsi'))
     return indexer.search(section, text)
 
 
 def match(section, text, **kwargs):
-    indexer = __cached_indexer(**kwargs)
+    indexer = load_indexer(kwargs.pop('model', 'index.lsi'))
     return indexer.get(section, text, **kwargs)
 
 
 def similarities(section, text, **kwargs):
-    indexer = __cached_indexer(**kwargs)
+    indexer = load_indexer(kwargs.pop('model', 'index.lsi'))
     return indexer.similarities(section, text)
+
+
+def batch_search(section, texts, **kwargs):
+    indexer = load_indexer(kwargs.pop('model', 'index.lsi'))
+    return indexer.batch_search(section, texts)
+
+
+def batch_match(section, texts, **kwargs):
+    indexer = load_indexer(kwargs.pop('model', 'index.lsi'))
+    return indexer.batch_get(section, texts, **kwargs)
+
+
+def batch_similarities(section, texts, **kwargs):
+    indexer = load_indexer(kwargs.pop('model', 'index.lsi'))
+    return indexer.batch_similarities(section, texts)
@@ -1,6 +1,7 @@
+from .index import DeleteSpeller
 from .index import LSIndexer
 from .index import LSSpeller
 
 __all__ = [
-    'LSIndexer', 'LSSpeller'
+    'LSIndexer', 'LSSpeller', 'DeleteSpeller'
 ]
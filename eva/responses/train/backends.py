@@ -0,0 +1,332 @@
+from concurrent.futures import ThreadPoolExecutor
+from gensim import similarities
+from itertools import islice
+import numpy as np
+
+__all__ = [
+    'top_k', 'dense_rows', 'recall', 'ShardedIndex', 'IVFIndex', 'backends'
+]
+
+
+def top_k(scores, limit, min_score, ids=None):
+    if ids is None:
+        ids = np.arange(len(scores))
+    mask = scores >= min_score
+    ids, scores = ids[mask], scores[mask]
+    if limit is not None and len(ids) > limit:
+        kth = np.partition(scores, len(ids) - limit)[len(ids) - limit]
+        keep = scores > kth
+        ties = np.flatnonzero(scores == kth)
+        ties = ties[np.argsort(ids[ties], kind='mergesort')]
+        keep[ties[:limit - keep.sum()]] = True
+        ids, scores = ids[keep], scores[keep]
+    order = np.lexsort((ids, -scores))
+    return ids[order], scores[order]
+
+
+def dense_rows(vectors, num_features):
+    return similarities.MatrixSimilarity(
+        vectors, num_features=num_features
+    ).index
+
+
+def recall(approximate, exact):
+    found = total = 0
+    for (ids, _), (exact_ids, _) in zip(approximate, exact):
+        found += len(np.intersect1d(ids, exact_ids))
+        total += len(exact_ids)
+    return found / total if total else 1.0
+
+
+def kmeans(rows, k, iterations=10, seed=0, chunk_size=65536):
+    random = np.random.RandomState(seed)
+    centroids = rows[random.choice(len(rows), k, replace=False)].copy()
+    assign = np.zeros(len(rows), dtype=np.int64)
+    for _ in range(iterations):
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            assign[start:start + chunk_size] = np.argmax(
+                np.dot(chunk, centroids.T), axis=1
+            )
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, rows)
+        norms = np.linalg.norm(sums, axis=1)
+        filled = norms > 0
+        centroids[filled] = sums[filled] / norms[filled, None]
+    return centroids, assign
+
+
+class ShardedIndex(object):
+
+    backend = 'sharded'
+
+    def __init__(self, num_features, shard_size=100000, workers=None):
+        self.num_features = num_features
+        self.shard_size = shard_size
+        self.workers = workers
+        self.shards = []
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_executor', None)
+        return state
+
+    @classmethod
+    def from_rows(cls, rows, num_features, shard_size=100000, workers=None):
+        index = cls(num_features, shard_size, workers)
+        index.add_rows(rows)
+        return index
+
+    def add(self, vectors):
+        vectors = iter(vectors)
+        while True:
+            chunk = list(islice(vectors, self.shard_size))
+            if not chunk:
+                break
+            self.add_rows(dense_rows(chunk, self.num_features))
+
+    def add_rows(self, rows):
+        rows = np.asarray(rows, dtype=np.float32)
+        if self.shards and len(self.shards[-1]) < self.shard_size:
+            free = self.shard_size - len(self.shards[-1])
+            self.shards[-1] = np.vstack([self.shards[-1], rows[:free]])
+            rows = rows[free:]
+        for start in range(0, len(rows), self.shard_size):
+            self.shards.append(rows[start:start + self.shard_size])
+
+    def keep(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        shards = []
+        offset = 0
+        for shard in self.shards:
+            local = ids[(ids >= offset) & (ids < offset + len(shard))]
+            if len(local):
+                shards.append(np.asarray(shard)[local - offset])
+            offset += len(shard)
+        self.shards = shards
+
+    def get_state(self):
+        return {
+            'num_features': self.num_features,
+            'shard_size': self.shard_size,
+            'workers': self.workers,
+            'shards': len(self.shards),
+        }, {
+            'shard_%d' % i: np.asarray(shard)
+            for i, shard in enumerate(self.shards)
+        }
+
+    @classmethod
+    def from_state(cls, params, arrays):
+        index = cls(
+            params['num_features'], params['shard_size'], params['workers']
+        )
+        index.shards = [
+            arrays['shard_%d' % i] for i in range(params['shards'])
+        ]
+        return index
+
+    @property
+    def offsets(self):
+        return np.cumsum([0] + [len(shard) for shard in self.shards])
+
+    @property
+    def index(self):
+        if not self.shards:
+            return np.zeros((0, self.num_features), dtype=np.float32)
+        return np.vstack(self.shards)
+
+    def executor(self):
+        if getattr(self, '_executor', None) is None:
+            self._executor = ThreadPoolExecutor(self.workers)
+        return self._executor
+
+    def _score_shard(self, args):
+        shard, offset, queries, limit, min_score = args
+        scores = np.dot(shard, queries.T).T
+        return [
+            top_k(row, limit, min_score, ids=np.arange(len(row)) + offset)
+            for row in scores
+        ]
+
+    def top_k(self, vectors, limit=100, min_score=0.1):
+        queries = dense_rows(vectors, self.num_features)
+        jobs = [
+            (shard, offset, queries, limit, min_score)
+            for shard, offset in zip(self.shards, self.offsets)
+        ]
+        if len(jobs) > 1 and self.workers != 1:
+            results = list(self.executor().map(self._score_shard, jobs))
+        else:
+            results = [self._score_shard(job) for job in jobs]
+        merged = []
+        for i in range(len(queries)):
+            parts = [result[i] for result in results]
+            if not parts:
+                merged.append((
+                    np.zeros(0, dtype=np.int64),
+                    np.zeros(0, dtype=np.float32)
+                ))
+                continue
+            merged.append(top_k(
+                np.concatenate([scores for _, scores in parts]),
+                limit, min_score,
+                ids=np.concatenate([ids for ids, _ in parts])
+            ))
+        return merged
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def __repr__(self):
+        return '%s(documents=%s, shards=%s, shard_size=%s)' % (
+            self.__class__.__name__,
+            len(self),
+            len(self.shards),
+            self.shard_size
+        )
+
+
+class IVFIndex(object):
+
+    backend = 'ivf'
+
+    def __init__(self, num_features, lists=None, probes=8, seed=0):
+        self.num_features = num_features
+        self.lists = lists
+        self.probes = probes
+        self.seed = seed
+        self.centroids = np.zeros((0, num_features), dtype=np.float32)
+        self.rows = np.zeros((0, num_features), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+    @classmethod
+    def from_rows(cls, rows, num_features, lists=None, probes=8, seed=0):
+        index = cls(num_features, lists, probes, seed)
+        index.train(rows)
+        return index
+
+    def train(self, rows):
+        rows = np.asarray(rows, dtype=np.float32)
+        if not len(rows):
+            return
+        lists = min(self.lists or int(np.sqrt(len(rows))) or 1, len(rows))
+        self.centroids, assign = kmeans(rows, lists, seed=self.seed)
+        self._store(rows, np.arange(len(rows)), assign)
+
+    def _store(self, rows, ids, assign):
+        order = np.argsort(assign, kind='mergesort')
+        self.rows = rows[order]
+        self.ids = ids[order]
+        self.offsets = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(assign, minlength=len(self.centroids)),
+            out=self.offsets[1:]
+        )
+
+    def _assign(self, rows):
+        return np.argmax(np.dot(rows, self.centroids.T), axis=1)
+
+    def add(self, vectors):
+        self.add_rows(dense_rows(vectors, self.num_features))
+
+    def add_rows(self, rows):
+        rows = np.asarray(rows, dtype=np.float32)
+        if not len(self.centroids):
+            return self.train(np.vstack([self.index, rows]))
+        lists = np.repeat(
+            np.arange(len(self.centroids)), np.diff(self.offsets)
+        )
+        self._store(
+            np.vstack([self.rows, rows]),
+            np.concatenate([self.ids, len(self) + np.arange(len(rows))]),
+            np.concatenate([lists, self._assign(rows)])
+        )
+
+    def keep(self, ids):
+        remap = np.full(len(self), -1, dtype=np.int64)
+        remap[np.asarray(ids, dtype=np.int64)] = np.arange(len(ids))
+        kept = remap[self.ids] >= 0
+        lists = np.repeat(
+            np.arange(len(self.centroids)), np.diff(self.offsets)
+        )
+        self._store(
+            np.asarray(self.rows)[kept], remap[self.ids][kept], lists[kept]
+        )
+
+    @property
+    def index(self):
+        rows = np.zeros((len(self), self.num_features), dtype=np.float32)
+        rows[self.ids] = self.rows
+        return rows
+
+    def get_state(self):
+        return {
+            'num_features': self.num_features,
+            'lists': self.lists,
+            'probes': self.probes,
+            'seed': self.seed,
+        }, {
+            'centroids': np.asarray(self.centroids),
+            'rows': np.asarray(self.rows),
+            'ids': np.asarray(self.ids),
+            'offsets': np.asarray(self.offsets),
+        }
+
+    @classmethod
+    def from_state(cls, params, arrays):
+        index = cls(
+            params['num_features'], params['lists'],
+            params['probes'], params['seed']
+        )
+        for key in ('centroids', 'rows', 'ids', 'offsets'):
+            setattr(index, key, arrays[key])
+        return index
+
+    def top_k(self, vectors, limit=100, min_score=0.1, probes=None):
+        queries = dense_rows(vectors, self.num_features)
+        probes = min(probes or self.probes, len(self.centroids))
+        if not probes:
+            return [
+                (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+                for _ in queries
+            ]
+        nearest = np.argsort(
+            -np.dot(queries, self.centroids.T), axis=1
+        )[:, :probes]
+        results = []
+        for query, lists in zip(queries, nearest):
+            positions = np.concatenate([
+                np.arange(self.offsets[i], self.offsets[i + 1])
+                for i in lists
+            ])
+            results.append(top_k(
+                np.dot(self.rows[positions], query), limit, min_score,
+                ids=self.ids[positions]
+            ))
+        return results
+
+    def exact_top_k(self, vectors, limit=100, min_score=0.1):
+        queries = dense_rows(vectors, self.num_features)
+        return [
+            top_k(np.dot(self.rows, query), limit, min_score, ids=self.ids)
+            for query in queries
+        ]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return '%s(documents=%s, lists=%s, probes=%s)' % (
+            self.__class__.__name__,
+            len(self),
+            len(self.centroids),
+            self.probes
+        )
+
+
+backends = {
+    ShardedIndex.backend: ShardedIndex,
+    IVFIndex.backend: IVFIndex,
+}
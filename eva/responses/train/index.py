@@ -1,37 +1,107 @@
+from boltons.cacheutils import LRU
+from collections import Counter
 from collections import defaultdict
 from difflib import SequenceMatcher
+from eva import instrument
+from eva.responses.train.backends import IVFIndex
+from eva.responses.train.backends import ShardedIndex
+from eva.responses.train.backends import backends
+from eva.responses.train.backends import dense_rows
+from eva.responses.train.backends import recall
+from eva.responses.train.backends import top_k
+from eva.utils.normalizer import Normalizer
+from eva.utils.storage import CsrCorpus
+from eva.utils.storage import TextArray
+from eva.utils.storage import is_state_dir
+from eva.utils.storage import load_state
+from eva.utils.storage import save_state
+from eva.utils.text import batch_regex_tokenize
+from eva.utils.text import regex_tokenize
 from gensim import corpora
 from gensim import models
 from gensim import similarities
-from nltk.corpus import stopwords
-from nltk.stem import SnowballStemmer
-from unicodedata import normalize
+from multiprocessing import Pool
+from functools import partial
+from os.path import join
+import numpy as np
 import pickle
 import re
 
+try:
+    from rapidfuzz import fuzz
+except ImportError:  # pragma: no cover
+    fuzz = None
 
-def normalize_ascii(value):
-    try:
-        return normalize('NFKD', str(value)) \
-            .encode('ascii', 'ignore').decode('ascii')
-    except Exception:
-        return value
 
-
-def regex_tokenize(sentence):
-    return list(filter(None, map(
-        normalize_ascii,
-        re.split(
-            r'\s|\t|\n|\r|\?|\-|\_|\.|\,|\!|\(|\)',
-            sentence
-        )
-    )))
+WORDS_RE = re.compile(r'\w+|\d+')
 
 
 def ratio(a, b):
     return SequenceMatcher(a=a.upper(), b=b.upper()).ratio()
 
 
+def difflib_scorer(document):
+    matcher = SequenceMatcher(b=document.upper())
+
+    def scorer(doc):
+        matcher.set_seq1(doc.upper())
+        return matcher.ratio()
+
+    return scorer
+
+
+def rapidfuzz_scorer(document):
+    if fuzz is None:
+        raise ImportError(
+            'The rapidfuzz scorer requires the rapidfuzz package.'
+        )
+    document = document.upper()
+
+    def scorer(doc):
+        return fuzz.ratio(doc.upper(), document) / 100.0
+
+    return scorer
+
+
+scorers = {
+    'difflib': difflib_scorer,
+    'rapidfuzz': rapidfuzz_scorer,
+}
+
+
+def deletes(word, distance):
+    result = {word}
+    edits = {word}
+    for _ in range(distance):
+        edits = {
+            edit[:i] + edit[i + 1:]
+            for edit in edits for i in range(len(edit))
+        }
+        result |= edits
+    return result
+
+
+def bounded_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(
+                row[j] + 1, current[j - 1] + 1, row[j - 1] + cost
+            )
+            if cost and previous and i > 1 and j > 1 and \
+                    a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous, row = row, current
+    return min(row[-1], limit + 1)
+
+
 def remove_uf(doc):
     return ' '.join(doc.split()[1:])
 
@@ -57,37 +127,259 @@ class Bunch(dict):
         pass
 
 
+def appended(store, items):
+    # stores loaded from the directory format stay array-backed
+    if isinstance(store, (TextArray, CsrCorpus)):
+        return store.append(items)
+    return list(store) + list(items)
+
+
+def taken(store, indices):
+    if isinstance(store, (TextArray, CsrCorpus)):
+        return store.take(indices)
+    return [store[i] for i in indices]
+
+
+def export_section(path, sec):
+    state = {}
+    if 'documents' in sec:
+        documents = TextArray.from_list(sec.documents)
+        state['documents_data'] = documents.data
+        state['documents_offsets'] = documents.offsets
+    if 'dictionary' in sec:
+        state['dictionary'] = {
+            'token2id': sec.dictionary.token2id,
+            'dfs': sec.dictionary.dfs,
+            'num_docs': sec.dictionary.num_docs,
+            'num_pos': sec.dictionary.num_pos,
+            'num_nnz': sec.dictionary.num_nnz,
+        }
+    if 'corpus' in sec:
+        corpus = CsrCorpus.from_corpus(sec.corpus)
+        state['corpus_indptr'] = corpus.indptr
+        state['corpus_indices'] = corpus.indices
+        state['corpus_data'] = corpus.data
+    if 'tfidf' in sec:
+        ids = sorted(sec.tfidf.idfs)
+        state['tfidf_ids'] = np.asarray(ids, dtype=np.int64)
+        state['tfidf_idfs'] = np.asarray(
+            [sec.tfidf.idfs[i] for i in ids], dtype=np.float64
+        )
+        state['tfidf'] = {
+            'num_docs': sec.tfidf.num_docs,
+            'num_nnz': sec.tfidf.num_nnz,
+        }
+    if 'lsi' in sec:
+        state['lsi_u'] = sec.lsi.projection.u
+        state['lsi_s'] = sec.lsi.projection.s
+        state['lsi'] = {
+            'num_topics': sec.lsi.num_topics,
+            'chunksize': sec.lsi.chunksize,
+            'decay': sec.lsi.decay,
+            'onepass': sec.lsi.onepass,
+            'power_iters': sec.lsi.power_iters,
+            'extra_samples': sec.lsi.extra_samples,
+            'docs_processed': sec.lsi.docs_processed,
+        }
+    if 'counts' in sec:
+        state['counts'] = np.asarray(sec.counts, dtype=np.int64)
+    for key in ('params', 'updates'):
+        if key in sec:
+            state[key] = sec[key]
+    if isinstance(sec.get('index'), tuple(backends.values())):
+        params, arrays = sec.index.get_state()
+        params['backend'] = sec.index.backend
+        state['index'] = params
+        for key, value in arrays.items():
+            state['index_%s' % key] = value
+    elif 'index' in sec:
+        state['index_matrix'] = np.asarray(sec.index.index)
+        state['index'] = {
+            'num_features': sec.index.num_features,
+            'normalize': sec.index.normalize,
+        }
+    return save_state(path, state)
+
+
+def import_section(path, mmap_mode='r'):
+    state = load_state(path, mmap_mode)
+    sec = Bunch()
+    if 'documents_data' in state:
+        sec.documents = TextArray(
+            state['documents_data'], state['documents_offsets']
+        )
+    if 'dictionary' in state:
+        sec.dictionary = corpora.Dictionary()
+        sec.dictionary.token2id = state['dictionary']['token2id']
+        sec.dictionary.dfs = {
+            int(k): v for k, v in state['dictionary']['dfs'].items()
+        }
+        sec.dictionary.num_docs = state['dictionary']['num_docs']
+        sec.dictionary.num_pos = state['dictionary']['num_pos']
+        sec.dictionary.num_nnz = state['dictionary']['num_nnz']
+    if 'corpus_indptr' in state:
+        sec.corpus = CsrCorpus(
+            state['corpus_indptr'],
+            state['corpus_indices'],
+            state['corpus_data']
+        )
+    if 'tfidf' in state:
+        sec.tfidf = models.TfidfModel(dictionary=sec.dictionary)
+        sec.tfidf.idfs = dict(zip(
+            state['tfidf_ids'].tolist(), state['tfidf_idfs'].tolist()
+        ))
+        sec.tfidf.num_docs = state['tfidf']['num_docs']
+        sec.tfidf.num_nnz = state['tfidf']['num_nnz']
+    if 'lsi' in state:
+        params = state['lsi']
+        docs_processed = params.pop('docs_processed')
+        sec.lsi = models.LsiModel(id2word=sec.dictionary, **params)
+        sec.lsi.projection.u = state['lsi_u']
+        sec.lsi.projection.s = state['lsi_s']
+        sec.lsi.num_terms = state['lsi_u'].shape[0]
+        sec.lsi.projection.m = state['lsi_u'].shape[0]
+        sec.lsi.docs_processed = docs_processed
+    if 'counts' in state:
+        sec.counts = state['counts']
+    for key in ('params', 'updates'):
+        if key in state:
+            sec[key] = state[key]
+    if state.get('index', {}).get('backend') in backends:
+        params = dict(state['index'])
+        sec.index = backends[params.pop('backend')].from_state(params, {
+            key[len('index_'):]: value for key, value in state.items()
+            if key.startswith('index_')
+        })
+    elif 'index' in state:
+        sec.index = similarities.MatrixSimilarity(
+            [], num_features=state['index']['num_features']
+        )
+        sec.index.index = state['index_matrix']
+        sec.index.normalize = state['index']['normalize']
+    return sec
+
+
+def _fit_section(args):
+    cls, speller, section, documents, kwargs = args
+    indexer = cls(speller=speller)
+    indexer.fit(section, documents, **kwargs)
+    return (
+        indexer.sections[section],
+        indexer.spellers.sections[section],
+        indexer.stemmer
+    )
+
+
 class LSIndexer:
 
+    correction_cache_size = 10000
+    refit_threshold = 0.25
+
     def __init__(self, *args, **kwargs):
         self.sections = defaultdict(Bunch)
-        self.spellers = LSSpeller()
+        self.spellers = spellers[kwargs.get('speller', 'lsi')]()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_corrections', None)
+        return state
 
     def save(self, path):
         with open(path, 'wb') as f:
             pickle.dump(self, f)
         return self
 
-    def load(self, path):
+    def load(self, path, mmap_mode='r'):
+        if is_state_dir(path):
+            return self._import(path, mmap_mode)
         with open(path, 'rb') as f:
             instance = pickle.load(f)
             self.__dict__ = instance.__dict__
+        if 'stemmer' in self.__dict__:
+            self.stemmer = Normalizer.from_stemmer(self.stemmer)
+        return self
+
+    def export(self, path):
+        sections = list(self.sections)
+        spellers = list(self.spellers.sections)
+        for i, section in enumerate(sections):
+            export_section(
+                join(path, 'sections', str(i)), self.sections[section]
+            )
+        for i, section in enumerate(spellers):
+            export_section(
+                join(path, 'spellers', str(i)),
+                self.spellers.sections[section]
+            )
+        stemmer = getattr(self, 'stemmer', None)
+        save_state(path, {
+            'format': self.__class__.__name__,
+            'sections': sections,
+            'spellers': spellers,
+            'speller': self.spellers.backend,
+            'stopwords': sorted(stemmer.stopwords) if stemmer else None,
+        })
+        return self
+
+    def _import(self, path, mmap_mode='r'):
+        state = load_state(path, mmap_mode)
+        self.__dict__ = self.__class__(
+            speller=state.get('speller', 'lsi')
+        ).__dict__
+        for i, section in enumerate(state['sections']):
+            self.sections[section] = import_section(
+                join(path, 'sections', str(i)), mmap_mode
+            )
+        for i, section in enumerate(state['spellers']):
+            self.spellers.replace(section, import_section(
+                join(path, 'spellers', str(i)), mmap_mode
+            ))
+        if state['stopwords'] is not None:
+            self.stemmer = Normalizer(state['stopwords'])
         return self
 
     def fit(self, section, documents, **kwargs):
         sec = self.sections[section]
-        self.stemmer = SnowballStemmer(language='portuguese')
-        self.stemmer.stopwords = stopwords.words('portuguese')
+        self.stemmer = Normalizer()
         sec.documents = documents
-        texts = [
-            self.transform(section, document)
-            for document in documents
-        ]
+        texts = self.batch_transform(section, documents)
         self.spellers.fit(section, documents)
+        self.corrections(section).clear()
         self.build(section, texts, **kwargs)
 
+    def fit_sections(self, sections, processes=None, **kwargs):
+        jobs = [
+            (self.__class__, self.spellers.backend, section,
+             list(documents), kwargs)
+            for section, documents in sections.items()
+        ]
+        if processes != 1 and len(jobs) > 1:
+            with Pool(processes) as pool:
+                results = pool.map(_fit_section, jobs)
+        else:
+            results = [_fit_section(job) for job in jobs]
+        for job, (sec, speller, stemmer) in zip(jobs, results):
+            section = job[2]
+            self.sections[section] = sec
+            self.spellers.replace(section, speller)
+            self.stemmer = stemmer
+            self.corrections(section).clear()
+
     def build(self, section, texts, **kwargs):
         sec = self.sections[section]
+        sec.params = {
+            'num_topics': kwargs.pop('num_topics', 200),
+            'power_iters': kwargs.pop('power_iters', 2),
+            'shard_size': kwargs.pop('shard_size', None),
+            'workers': kwargs.pop('workers', None),
+            'ann': kwargs.pop('ann', False),
+            'ann_lists': kwargs.pop('ann_lists', None),
+            'ann_probes': kwargs.pop('ann_probes', 8),
+        }
+        sec.updates = {
+            'size': len(texts), 'added': 0, 'removed': 0,
+            'tokens': 0, 'unknown': 0,
+        }
         sec.dictionary = corpora.Dictionary(texts)
         sec.corpus = [
             sec.dictionary.doc2bow(text)
@@ -97,16 +389,189 @@ class LSIndexer:
         sec.lsi = models.LsiModel(
             sec.tfidf[sec.corpus],
             id2word=sec.dictionary,
-            num_topics=kwargs.pop('num_topics', 200),
-            power_iters=kwargs.pop('power_iters', 2)
+            num_topics=sec.params['num_topics'],
+            power_iters=sec.params['power_iters']
         )
-        sec.index = similarities.MatrixSimilarity(
-            sec.lsi[sec.corpus]
+        sec.index = self.build_index(section, sec.lsi[sec.corpus])
+
+    def build_index(self, section, vectors, num_features=None):
+        sec = self.sections[section]
+        params = sec.get('params', {})
+        if not params.get('ann') and not params.get('shard_size'):
+            return similarities.MatrixSimilarity(
+                vectors, num_features=num_features
+            )
+        num_features = num_features or min(
+            sec.lsi.num_topics, len(sec.lsi.projection.s)
+        )
+        if params.get('ann'):
+            return IVFIndex.from_rows(
+                dense_rows(vectors, num_features), num_features,
+                params.get('ann_lists'), params.get('ann_probes', 8)
+            )
+        index = ShardedIndex(
+            num_features, params['shard_size'], params.get('workers')
+        )
+        index.add(vectors)
+        return index
+
+    def shard(self, section, shard_size=100000, workers=None):
+        sec = self.sections[section]
+        sec.setdefault('params', {}).update(
+            shard_size=shard_size, workers=workers, ann=False
+        )
+        if shard_size:
+            sec.index = ShardedIndex.from_rows(
+                sec.index.index, sec.index.num_features, shard_size, workers
+            )
+        else:
+            rows = sec.index.index
+            sec.index = similarities.MatrixSimilarity(
+                [], num_features=sec.index.num_features
+            )
+            sec.index.index = rows
+
+    def ann(self, section, lists=None, probes=8):
+        sec = self.sections[section]
+        sec.setdefault('params', {}).update(
+            ann=True, ann_lists=lists, ann_probes=probes
+        )
+        sec.index = IVFIndex.from_rows(
+            sec.index.index, sec.index.num_features, lists, probes
+        )
+
+    def recall(self, section, documents, limit=10, min_score=0.1,
+               probes=None):
+        sec = self.sections[section]
+        vectors = self._vectors(section, documents)
+        if not isinstance(sec.index, IVFIndex):
+            return 1.0
+        return recall(
+            sec.index.top_k(vectors, limit, min_score, probes),
+            sec.index.exact_top_k(vectors, limit, min_score)
         )
 
+    def use_speller(self, speller):
+        previous = self.spellers
+        self.spellers = spellers[speller]()
+        for section in previous.sections:
+            self.spellers.fit(section, self.sections[section].documents)
+            self.corrections(section).clear()
+
+    def _known(self, section, bows):
+        num_terms = self.sections[section].lsi.num_terms
+        return [[(i, v) for i, v in bow if i < num_terms] for bow in bows]
+
+    def _fold(self, section, texts, update_model=False):
+        sec = self.sections[section]
+        sec.dictionary.add_documents(texts)
+        bows = [sec.dictionary.doc2bow(text) for text in texts]
+        known = self._known(section, bows)
+        num_terms = sec.lsi.num_terms
+        updates = sec.setdefault('updates', {
+            'size': len(sec.documents), 'added': 0, 'removed': 0,
+            'tokens': 0, 'unknown': 0,
+        })
+        updates['added'] += len(texts)
+        updates['tokens'] += sum(len(text) for text in texts)
+        updates['unknown'] += sum(
+            v for bow in bows for i, v in bow if i >= num_terms
+        )
+        sec.corpus = appended(sec.corpus, bows)
+        num_features = sec.index.num_features
+        if update_model:
+            # the basis changes, so every document has to be re-projected
+            sec.lsi.add_documents(sec.tfidf[known])
+            sec.index = self.build_index(
+                section, sec.lsi[self._known(section, sec.corpus)],
+                num_features
+            )
+        elif isinstance(sec.index, tuple(backends.values())):
+            sec.index.add(sec.lsi[known])
+        else:
+            rows = dense_rows(sec.lsi[known], num_features)
+            sec.index.index = np.vstack([sec.index.index, rows])
+
+    def add_documents(self, section, documents, update_model=False):
+        documents = list(documents)
+        if section not in self.sections or not documents:
+            return self.fit(section, documents) if documents else None
+        sec = self.sections[section]
+        self.spellers.add_documents(section, documents)
+        self.corrections(section).clear()
+        texts = self.batch_transform(section, documents)
+        self._fold(section, texts, update_model)
+        sec.documents = appended(sec.documents, documents)
+        self.refit(section)
+
+    def remove_documents(self, section, documents):
+        sec = self.sections[section]
+        documents = set(documents)
+        keep = [
+            i for i, document in enumerate(sec.documents)
+            if document not in documents
+        ]
+        removed = len(sec.documents) - len(keep)
+        if removed:
+            sec.documents = taken(sec.documents, keep)
+            sec.corpus = taken(sec.corpus, keep)
+            if isinstance(sec.index, tuple(backends.values())):
+                sec.index.keep(keep)
+            else:
+                sec.index.index = np.asarray(sec.index.index)[keep]
+            sec.setdefault('updates', {
+                'size': len(sec.documents) + removed, 'added': 0,
+                'removed': 0, 'tokens': 0, 'unknown': 0,
+            })['removed'] += removed
+            self.refit(section)
+        return removed
+
+    def drift(self, section):
+        updates = self.sections[section].get('updates')
+        if not updates:
+            return 0.0
+        churn = (updates['added'] + updates['removed']) / \
+            max(updates['size'], 1)
+        unknown = updates['unknown'] / max(updates['tokens'], 1)
+        return max(churn, unknown)
+
+    def refit(self, section, force=False):
+        threshold = self.refit_threshold
+        if force or (
+            threshold is not None and self.drift(section) > threshold
+        ):
+            sec = self.sections[section]
+            self.fit(section, list(sec.documents), **sec.get('params', {}))
+            return True
+        return False
+
+    def corrections(self, section):
+        caches = self.__dict__.setdefault('_corrections', {})
+        if section not in caches:
+            caches[section] = LRU(
+                max_size=self.correction_cache_size,
+                on_miss=partial(self._correct, section)
+            )
+        return caches[section]
+
+    @instrument.timed('correct', method=True)
+    def _correct(self, section, word):
+        sec = self.spellers.sections[section]
+        if 'vocabulary' not in sec:
+            sec.vocabulary = frozenset(sec.documents)
+        if word in sec.vocabulary:
+            return word
+        return self.spellers.search(section, word) or word
+
     def correct(self, section, word):
         if section in self.spellers.sections:
-            return self.spellers.search(section, word)
+            corrections = self.corrections(section)
+            if instrument.enabled():
+                instrument.count(
+                    'correction_hit' if word in corrections
+                    else 'correction_miss'
+                )
+            return corrections[word]
         return word
 
     def transform(self, section, document):
@@ -116,28 +581,122 @@ class LSIndexer:
             if word not in self.stemmer.stopwords
         ]
 
-    def similarities(self, section, document,
-                     weight=0.5, limit=100, min_score=0.1):
-        stem = self.transform(section, document)
+    def batch_transform(self, section, documents):
+        stopwords = self.stemmer.stopwords
+        tokenized = [
+            [word.strip() for word in words if word not in stopwords]
+            for words in batch_regex_tokenize([
+                document.lower() for document in documents
+            ])
+        ]
+        stems = {
+            word: self.stemmer.stem(self.correct(section, word))
+            for word in {word for words in tokenized for word in words}
+        }
+        return [[stems[word] for word in words] for words in tokenized]
+
+    def candidates(self, section, document, limit=100, min_score=0.1):
+        return self.batch_candidates(
+            section, [document], limit, min_score
+        )[0]
+
+    @instrument.timed('project', method=True)
+    def _vectors(self, section, documents):
         sec = self.sections[section]
-        lsi = sec.lsi[sec.dictionary.doc2bow(stem)]
-        highest_score = sorted((
-            (sec.documents[_id], score)
-            for _id, score in enumerate(sec.index[lsi])
-        ), key=lambda item: -item[1])[:limit]
+        return list(sec.lsi[[
+            sec.dictionary.doc2bow(text)
+            for text in self.batch_transform(section, documents)
+        ]])
+
+    def batch_candidates(self, section, documents, limit=100, min_score=0.1):
+        if not documents:
+            return []
+        return self._scan(
+            section, self._vectors(section, documents), limit, min_score
+        )
+
+    @instrument.timed('scan', method=True)
+    def _scan(self, section, vectors, limit, min_score):
+        sec = self.sections[section]
+        if hasattr(sec.index, 'top_k'):
+            return sec.index.top_k(vectors, limit, min_score)
+        return [
+            top_k(scores, limit, min_score)
+            for scores in np.asarray(sec.index[vectors])
+        ]
+
+    @instrument.timed('rerank', method=True)
+    def _rerank(self, section, document, candidates, weight, scorer):
+        return self._ranked(section, document, candidates, weight, scorer)
+
+    def _ranked(self, section, document, candidates, weight, scorer):
+        documents = self.sections[section].documents
+        score_ratio = scorers[scorer](document)
         return sorted(((
-            doc, score, (score + ratio(doc, document) * weight)
-        ) for doc, score in highest_score if score >= min_score
-        ), key=lambda item: -item[2])
+            documents[_id], score,
+            (score + score_ratio(documents[_id]) * weight)
+        ) for _id, score in zip(*candidates)), key=lambda item: -item[2])
+
+    @instrument.timed('rerank', method=True)
+    def _best(self, section, document, candidates, weight, scorer):
+        if weight < 0:
+            similarities = self._ranked(
+                section, document, candidates, weight, scorer
+            )
+            return similarities[0][0] if similarities else None
+        documents = self.sections[section].documents
+        score_ratio = scorers[scorer](document)
+        best, best_score = None, None
+        for _id, score in zip(*candidates):
+            # ratio() is at most 1, so no later candidate can win
+            if best_score is not None and score + weight < best_score:
+                break
+            score = score + score_ratio(documents[_id]) * weight
+            if best_score is None or score > best_score:
+                best, best_score = documents[_id], score
+        return best
+
+    @instrument.timed('similarities', method=True)
+    def similarities(self, section, document, weight=0.5, limit=100,
+                     min_score=0.1, scorer='difflib'):
+        return self._rerank(
+            section, document,
+            self.candidates(section, document, limit, min_score),
+            weight, scorer
+        )
 
-    def search(self, section, document, **kwargs):
-        similarities = self.similarities(section, document.strip(), **kwargs)
-        if similarities:
-            return similarities[0][0]
-        return None
+    @instrument.timed('batch_similarities', method=True)
+    def batch_similarities(self, section, documents, weight=0.5, limit=100,
+                           min_score=0.1, scorer='difflib'):
+        return [
+            self._rerank(section, document, candidates, weight, scorer)
+            for document, candidates in zip(documents, self.batch_candidates(
+                section, documents, limit, min_score
+            ))
+        ]
 
-    def get(self, section, document, ratio=None, limit=None):
-        similarities = self.similarities(section, document)
+    @instrument.timed('search', method=True)
+    def search(self, section, document, weight=0.5, limit=100,
+               min_score=0.1, scorer='difflib'):
+        document = document.strip()
+        return self._best(
+            section, document,
+            self.candidates(section, document, limit, min_score),
+            weight, scorer
+        )
+
+    @instrument.timed('batch_search', method=True)
+    def batch_search(self, section, documents, weight=0.5, limit=100,
+                     min_score=0.1, scorer='difflib'):
+        documents = [document.strip() for document in documents]
+        return [
+            self._best(section, document, candidates, weight, scorer)
+            for document, candidates in zip(documents, self.batch_candidates(
+                section, documents, limit, min_score
+            ))
+        ]
+
+    def _filter(self, similarities, ratio, limit):
         if similarities:
             result = [
                 s[0] for s in similarities
@@ -146,6 +705,17 @@ class LSIndexer:
             return result[:limit] if limit else result
         return None
 
+    def get(self, section, document, ratio=None, limit=None):
+        return self._filter(
+            self.similarities(section, document), ratio, limit
+        )
+
+    def batch_get(self, section, documents, ratio=None, limit=None):
+        return [
+            self._filter(similarities, ratio, limit)
+            for similarities in self.batch_similarities(section, documents)
+        ]
+
     def __repr__(self):
         return '%s(sections=%s)' % (
             self.__class__.__name__,
@@ -155,25 +725,140 @@ class LSIndexer:
 
 class LSSpeller(LSIndexer):
 
+    backend = 'lsi'
+
     def __init__(self, *args, **kwargs):
         self.sections = defaultdict(Bunch)
 
+    def words(self, documents):
+        return WORDS_RE.findall(' '.join({
+            y.strip().lower() for words in batch_regex_tokenize(documents)
+            for y in words if not y.isdigit()
+        }))
+
     def fit(self, section, documents, **kwargs):
         sec = self.sections[section]
-        documents = re.findall(
-            r'\w+|\d+',
-            ' '.join({
-                y.strip().lower() for x in documents
-                for y in regex_tokenize(x)
-                if not y.isdigit()
-            })
-        )
+        documents = self.words(documents)
         sec.documents = documents
+        sec.vocabulary = frozenset(documents)
         texts = [
             self.transform(section, document)
             for document in documents
         ]
         self.build(section, texts, **kwargs)
 
+    def add_documents(self, section, documents, update_model=False):
+        if section not in self.sections:
+            return self.fit(section, documents)
+        sec = self.sections[section]
+        if 'vocabulary' not in sec:
+            sec.vocabulary = frozenset(sec.documents)
+        words = sorted(set(self.words(documents)) - sec.vocabulary)
+        if words:
+            self._fold(section, [
+                self.transform(section, word) for word in words
+            ], update_model)
+            sec.documents = appended(sec.documents, words)
+            sec.vocabulary = sec.vocabulary | frozenset(words)
+
+    def replace(self, section, sec):
+        self.sections[section] = sec
+
     def transform(self, section, document):
         return [word for word in document]
+
+    def batch_transform(self, section, documents):
+        return [self.transform(section, document) for document in documents]
+
+
+class DeleteSpeller(LSSpeller):
+
+    backend = 'delete'
+    max_distance = 2
+    prefix_length = 7
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_deletes', None)
+        return state
+
+    def fit(self, section, documents, **kwargs):
+        sec = self.sections[section]
+        counts = Counter(self.words(documents))
+        sec.documents = sorted(counts)
+        sec.vocabulary = frozenset(sec.documents)
+        sec.counts = np.asarray(
+            [counts[word] for word in sec.documents], dtype=np.int64
+        )
+        self.__dict__.setdefault('_deletes', {}).pop(section, None)
+
+    def replace(self, section, sec):
+        # the delete index holds ids into the old vocabulary
+        super().replace(section, sec)
+        self.__dict__.setdefault('_deletes', {}).pop(section, None)
+
+    def add_documents(self, section, documents, update_model=False):
+        if section not in self.sections:
+            return self.fit(section, documents)
+        sec = self.sections[section]
+        if 'vocabulary' not in sec:
+            sec.vocabulary = frozenset(sec.documents)
+        counts = Counter(self.words(documents))
+        words = sorted(set(counts) - sec.vocabulary)
+        if words:
+            sec.documents = appended(sec.documents, words)
+            sec.vocabulary = sec.vocabulary | frozenset(words)
+            sec.counts = np.concatenate([
+                sec.counts, [counts[word] for word in words]
+            ])
+            index = self.__dict__.get('_deletes', {}).get(section)
+            if index is not None:
+                self._index(index, words, len(sec.documents) - len(words))
+
+    def _index(self, index, words, start=0):
+        for i, word in enumerate(words, start):
+            for edit in deletes(
+                word[:self.prefix_length], self.max_distance
+            ):
+                index[edit].append(i)
+
+    def deletes(self, section):
+        caches = self.__dict__.setdefault('_deletes', {})
+        if section not in caches:
+            caches[section] = defaultdict(list)
+            self._index(caches[section], self.sections[section].documents)
+        return caches[section]
+
+    @instrument.timed('search', method=True)
+    def search(self, section, document, **kwargs):
+        sec = self.sections[section]
+        index = self.deletes(section)
+        ids = set()
+        for edit in deletes(
+            document[:self.prefix_length], self.max_distance
+        ):
+            ids.update(index.get(edit, ()))
+        best, best_key = None, None
+        for _id in ids:
+            word = sec.documents[_id]
+            limit = best_key[0] if best_key else self.max_distance
+            distance = bounded_distance(document, word, limit)
+            if distance > limit:
+                continue
+            key = (distance, -sec.counts[_id], word)
+            if best_key is None or key < best_key:
+                best, best_key = word, key
+        return best
+
+    def __repr__(self):
+        return '%s(sections=%s, max_distance=%s)' % (
+            self.__class__.__name__,
+            len(self.sections),
+            self.max_distance
+        )
+
+
+spellers = {
+    LSSpeller.backend: LSSpeller,
+    DeleteSpeller.backend: DeleteSpeller,
+}
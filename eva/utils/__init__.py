@@ -1,12 +1,45 @@
-from .date import date_parse
-from .parser import parse
-from .parser import zip_fill
-from .reader import IOBReader
-from .text import extract_text
-from .text import normalize_ascii
-from .text import regex_tokenize
+import importlib
+import sys
 
 __all__ = [
     'IOBReader', 'parse', 'extract_text', 'zip_fill', 'date_parse',
-    'normalize_ascii', 'regex_tokenize'
+    'batch_date_parse',
+    'normalize_ascii', 'regex_tokenize', 'Pipeline', 'Document', 'Normalizer',
+    'batch_normalize_ascii', 'batch_regex_tokenize'
 ]
+
+exports = {
+    'date_parse': 'date',
+    'batch_date_parse': 'date',
+    'parse': 'parser',
+    'zip_fill': 'parser',
+    'Document': 'pipeline',
+    'Pipeline': 'pipeline',
+    'Normalizer': 'normalizer',
+    'IOBReader': 'reader',
+    'extract_text': 'text',
+    'normalize_ascii': 'text',
+    'regex_tokenize': 'text',
+    'batch_normalize_ascii': 'text',
+    'batch_regex_tokenize': 'text',
+}
+
+
+def __getattr__(name):
+    if name in exports:
+        module = importlib.import_module('.' + exports[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(
+        'module %r has no attribute %r' % (__name__, name)
+    )
+
+
+def __dir__():
+    return sorted(set(globals()) | set(exports))
+
+
+if sys.version_info < (3, 7):  # no module __getattr__ (PEP 562)
+    for name in exports:
+        __getattr__(name)
@@ -1,7 +1,11 @@
+from boltons.cacheutils import LRU
+from datetime import datetime
 from dateutil import parser as dateutil_parser
+from dateutil.relativedelta import relativedelta
 from functools import partial
+import regex as re
 
-__all__ = ['date_parse']
+__all__ = ['date_parse', 'batch_date_parse', 'fuzzy_date_parse']
 
 
 class PortugueseParserInfo(dateutil_parser.parserinfo):
@@ -34,8 +38,130 @@ class PortugueseParserInfo(dateutil_parser.parserinfo):
     ]
 
 
-date_parse = partial(
+parserinfo = PortugueseParserInfo(dayfirst=True)
+
+fuzzy_date_parse = partial(
     dateutil_parser.parse,
     fuzzy=True,
-    parserinfo=PortugueseParserInfo(dayfirst=True)
+    parserinfo=parserinfo
+)
+
+
+def _table(rows, start=0, min_length=0):
+    return {
+        name: i for i, names in enumerate(rows, start) for name in names
+        if len(name) > min_length
+    }
+
+
+def _alternation(names):
+    return '|'.join(
+        re.escape(name) for name in sorted(names, key=len, reverse=True)
+    )
+
+
+MONTHS = _table(PortugueseParserInfo.MONTHS, start=1)
+# three letter weekdays clash with the HMS table ("seg"), leave them to
+# dateutil
+WEEKDAYS = _table(PortugueseParserInfo.WEEKDAYS, min_length=3)
+HOURS = PortugueseParserInfo.HMS[0]
+
+# dateutil reads "21.02" as a decimal and "de 18h" as a year, so dots and
+# "de" before a time are left to the fallback
+DATE = (
+    r'(?P<day>\d{1,2})(?:'
+    r'(?P<sep>[/-])(?P<month>\d{1,2})(?:(?P=sep)(?P<year>\d{4}|\d{2}))?|'
+    r'(?: de)? (?P<month_name>%s)(?:(?: de)? (?P<long_year>\d{4}))?'
+    r')' % _alternation(MONTHS)
 )
+WEEKDAY = r'(?P<weekday>%s)' % _alternation(WEEKDAYS)
+TIME = (
+    r'(?P<hour>\d{1,2})(?:'
+    r':(?P<minute>\d{2})(?::(?P<second>\d{2}))?|'
+    r'h(?P<hour_minute>\d{2})?|'
+    r' (?:%s)'
+    r')' % _alternation(HOURS)
+)
+DATE_RE = re.compile(
+    r'^(?:(?:%s|%s)(?:,? (?:(?:às|em) )?%s)?|(?:às )?%s)$' % (
+        DATE, WEEKDAY, TIME, TIME
+    )
+)
+SPACES_RE = re.compile(r'\s+')
+
+cache = LRU(max_size=10000)
+
+
+def normalize(text):
+    return SPACES_RE.sub(' ', text.strip().lower())
+
+
+def today():
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _fast_parse(text, default):
+    match = DATE_RE.match(text)
+    if match is None:
+        return None
+    groups = match.groupdict()
+    replace = {}
+    if groups['day']:
+        replace['day'] = int(groups['day'])
+        if groups['month']:
+            replace['month'] = int(groups['month'])
+        else:
+            replace['month'] = MONTHS[groups['month_name']]
+        year = groups['year'] or groups['long_year']
+        if year and len(year) > 2:
+            replace['year'] = int(year)
+        elif year:
+            replace['year'] = parserinfo.convertyear(int(year))
+    if groups['hour']:
+        replace['hour'] = int(groups['hour'])
+        minute = groups['minute'] or groups['hour_minute']
+        if minute:
+            replace['minute'] = int(minute)
+        if groups['second']:
+            replace['second'] = int(groups['second'])
+    try:
+        result = default.replace(**replace)
+    except ValueError:
+        return None
+    if groups['weekday']:
+        result += relativedelta(weekday=WEEKDAYS[groups['weekday']])
+    return result
+
+
+def _parse(text, default):
+    return _fast_parse(text, default) or fuzzy_date_parse(
+        text, default=default
+    )
+
+
+def date_parse(timestr, default=None, **kwargs):
+    if kwargs or not isinstance(timestr, str):
+        return fuzzy_date_parse(timestr, default=default, **kwargs)
+    text = normalize(timestr)
+    default = default or today()
+    key = (text, default)
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    result = cache[key] = _parse(text, default)
+    return result
+
+
+def batch_date_parse(texts, default=None, errors='raise'):
+    default = default or today()
+    results = {}
+    for text in texts:
+        if text not in results:
+            try:
+                results[text] = date_parse(text, default=default)
+            except (ValueError, OverflowError):
+                if errors == 'raise':
+                    raise
+                results[text] = None
+    return [results[text] for text in texts]
@@ -1,4 +1,7 @@
 from eva.config import EVA_PATH
+from eva.utils.storage import is_state_dir
+from eva.utils.storage import load_state
+from eva.utils.storage import save_state
 from os.path import join
 import pickle
 
@@ -14,8 +17,22 @@ class SerializeMixin(object):
             pickle.dump(self, f)
         return self
 
-    def load(self, path):
-        with open(join(EVA_PATH, 'models', path), 'rb') as f:
+    def load(self, path, mmap_mode='r'):
+        path = join(EVA_PATH, 'models', path)
+        if is_state_dir(path):
+            self.import_state(load_state(path, mmap_mode))
+            return self
+        with open(path, 'rb') as f:
             instance = pickle.load(f)
             self.__dict__ = instance.__dict__
         return self
+
+    def export(self, path):
+        save_state(join(EVA_PATH, 'models', path), self.export_state())
+        return self
+
+    def export_state(self):
+        return dict(self.__dict__)
+
+    def import_state(self, state):
+        self.__dict__.update(state)
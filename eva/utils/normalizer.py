@@ -0,0 +1,66 @@
+from boltons.cacheutils import LRU
+from nltk.corpus import stopwords as nltk_stopwords
+from nltk.stem import SnowballStemmer
+from nltk.tokenize import word_tokenize
+from threading import Lock
+
+__all__ = [
+    'Normalizer'
+]
+
+
+class Normalizer(object):
+
+    cache_size = 50000
+    caches = {}
+    lock = Lock()
+
+    def __init__(self, stopwords=None, language='portuguese'):
+        self.language = language
+        if stopwords is None:
+            stopwords = nltk_stopwords.words(language)
+        self.stopwords = frozenset(stopwords)
+
+    @classmethod
+    def from_stemmer(cls, stemmer):
+        if isinstance(stemmer, cls):
+            return stemmer
+        if stemmer is None:
+            return cls()
+        return cls(stemmer.stopwords)
+
+    @property
+    def cache(self):
+        # stems only depend on the language, so every instance shares them
+        with self.lock:
+            if self.language not in self.caches:
+                self.caches[self.language] = LRU(
+                    max_size=self.cache_size,
+                    on_miss=SnowballStemmer(language=self.language).stem
+                )
+            return self.caches[self.language]
+
+    def stem(self, word):
+        return self.cache[word]
+
+    def stem_tokens(self, tokens):
+        cache = self.cache
+        return [
+            cache[token] for token in tokens
+            if token not in self.stopwords
+        ]
+
+    def batch_stem(self, texts, tokenize=word_tokenize):
+        return [self.stem_tokens(tokenize(text)) for text in texts]
+
+    def hit_rate(self):
+        cache = self.cache
+        total = cache.hit_count + cache.miss_count
+        return cache.hit_count / total if total else 0.0
+
+    def __repr__(self):
+        return '%s(language=%r, stopwords=%s)' % (
+            self.__class__.__name__,
+            self.language,
+            len(self.stopwords)
+        )
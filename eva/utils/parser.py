@@ -1,22 +1,18 @@
-from eva.entities.tag import entity_dict
-from eva.intents.classify import get_intent
+from eva import instrument
+from eva.utils.pipeline import Pipeline
 from itertools import zip_longest
 
 __all__ = ['parse', 'zip_fill']
 
+pipeline = Pipeline()
 
-def parse(*sents):
-    return [
-        {
-            'entities': entities,
-            'intent': intent,
-            'raw': sent
-        } for entities, intent, sent in zip(
-            entity_dict(*sents),
-            get_intent(*sents),
-            sents
-        )
-    ]
+
+@instrument.timed('parse')
+def parse(*sents, **kwargs):
+    instrument.count('parsed_sentences', len(sents))
+    if kwargs.pop('compact', False):
+        return [doc.to_compact() for doc in pipeline(*sents)]
+    return [doc.to_dict() for doc in pipeline(*sents)]
 
 
 def zip_fill(*items):
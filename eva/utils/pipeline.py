@@ -0,0 +1,107 @@
+from eva import instrument
+from eva.entities.spans import EntitySpans
+from eva.entities.tag import iob_tag_pos
+from eva.entities.tag import pos_tag_tokens
+from eva.intents.classify import load_classifier
+from nltk.tokenize import word_tokenize
+
+__all__ = [
+    'Document', 'Pipeline'
+]
+
+
+class Document(object):
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.tokens = []
+        self.pos = []
+        self.iob = []
+        self.stems = []
+        self.spans = None
+        self.intent = None
+
+    @property
+    def entities(self):
+        if self.spans is None:
+            return []
+        return self.spans.to_list()
+
+    def to_dict(self):
+        return {
+            'entities': self.entities,
+            'intent': self.intent,
+            'raw': self.raw
+        }
+
+    def to_compact(self):
+        spans = self.spans.to_compact() if self.spans is not None else {
+            'tokens': self.tokens, 'spans': []
+        }
+        spans.update(intent=self.intent, raw=self.raw)
+        return spans
+
+    def __repr__(self):
+        return '%s(raw=%r, tokens=%s)' % (
+            self.__class__.__name__,
+            self.raw,
+            len(self.tokens)
+        )
+
+
+class Pipeline(object):
+
+    def __init__(self, *args, **kwargs):
+        self.pos_model = kwargs.pop('pos_model', 'pos.model')
+        self.iob_model = kwargs.pop('iob_model', 'iob.model')
+        self.intent_model = kwargs.pop('intent_model', 'intents.model')
+        super().__init__(*args, **kwargs)
+
+    def tokenize(self, docs):
+        for doc in docs:
+            doc.tokens = word_tokenize(doc.raw)
+
+    def tag(self, docs):
+        pos_sents = pos_tag_tokens(
+            *[doc.tokens for doc in docs], model=self.pos_model
+        )
+        iob_sents = iob_tag_pos(*pos_sents, model=self.iob_model)
+        for doc, pos, iob in zip(docs, pos_sents, iob_sents):
+            doc.pos = pos
+            doc.iob = iob
+
+    def stem(self, docs):
+        classifier = load_classifier(model=self.intent_model)
+        for doc in docs:
+            doc.stems = classifier.stem_tokens(doc.tokens)
+
+    def extract_entities(self, docs):
+        for doc in docs:
+            doc.spans = EntitySpans.from_iob(doc.iob)
+
+    def classify(self, docs):
+        classifier = load_classifier(model=self.intent_model)
+        intents = classifier.predict_stems([doc.stems for doc in docs])
+        for doc, intent in zip(docs, intents):
+            doc.intent = intent
+
+    def __call__(self, *sents):
+        docs = [Document(sent) for sent in sents]
+        if docs:
+            with instrument.timer('tokenize'):
+                self.tokenize(docs)
+            self.tag(docs)
+            with instrument.timer('stem'):
+                self.stem(docs)
+            with instrument.timer('extract_entities'):
+                self.extract_entities(docs)
+            self.classify(docs)
+        return docs
+
+    def __repr__(self):
+        return '%s(pos_model=%r, iob_model=%r, intent_model=%r)' % (
+            self.__class__.__name__,
+            self.pos_model,
+            self.iob_model,
+            self.intent_model
+        )
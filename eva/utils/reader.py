@@ -1,17 +1,146 @@
+from bisect import bisect_right
 from eva.entities.tag import pos_tag
+from eva.registry import model_path
+from eva.registry import registry
 from glob import glob
+from itertools import islice
+from multiprocessing import Pool
 from nltk import word_tokenize
 from nltk.chunk import conlltags2tree
 from os.path import basename
 from os.path import join
 from os.path import splitext
 from sklearn.model_selection import train_test_split
+import hashlib
+import json
+import os
 import regex as re
 
 __all__ = [
     'IOBReader'
 ]
 
+CACHE_VERSION = 2
+TAGS_RE = r'\[(.*?)\]'
+SPLITS = {
+    (False, False): 'train_set', (True, False): 'test_set',
+    (False, True): 'iob_train', (True, True): 'iob_test',
+}
+
+
+def token_offsets(text, tokens, start=0):
+    offsets = []
+    position = 0
+    for token in tokens:
+        found = text.find(token, position)
+        if found < 0:
+            offsets.append(None)
+            continue
+        offsets.append(start + found)
+        position = found + len(token)
+    return offsets
+
+
+def split_segments(sentence):
+    segments = []
+    position = 0
+    for match in re.finditer(TAGS_RE, sentence):
+        segments.append((None, sentence[position:match.start()]))
+        segments.append(tuple(match.group(1).split(' ', 1)))
+        position = match.end()
+    segments.append((None, sentence[position:]))
+    return segments
+
+
+def annotate(segments, pos_tags):
+    clean = ''.join(value for _, value in segments)
+    shift = len(clean) - len(clean.lstrip())
+    text = clean.strip()
+    starts = token_offsets(text, [w for w, _ in pos_tags])
+    known = [
+        (start, start + len(w), pos)
+        for start, (w, pos) in zip(starts, pos_tags) if start is not None
+    ]
+    known_starts = [start for start, _, _ in known]
+
+    def pos_at(offset):
+        if offset is None:
+            return None
+        i = bisect_right(known_starts, offset) - 1
+        if i >= 0 and offset < known[i][1]:
+            return known[i][2]
+        return None
+
+    iob = []
+    start = -shift
+    for tag, value in segments:
+        words = word_tokenize(value)
+        for i, (word, offset) in enumerate(zip(
+            words, token_offsets(value, words, start)
+        )):
+            if tag is None:
+                label = 'O'
+            else:
+                label = '%s-%s' % ('I' if i else 'B', tag)
+            iob.append((word, pos_at(offset), label))
+        start += len(value)
+    return iob
+
+
+def file_label(filename):
+    return splitext(basename(filename))[0]
+
+
+def clean_text(segments):
+    return ''.join(value for _, value in segments).strip('\n').strip()
+
+
+def read_lines(sentences, label, pos_model='pos.model'):
+    segments = [split_segments(sentence) for sentence in sentences]
+    sents = [clean_text(s) for s in segments]
+    pos_sents = pos_tag(*sents, model=pos_model) if sents else []
+    return {
+        'sents': sents,
+        'feature_set': [(text, label) for text in sents],
+        'iob_sents': [
+            annotate(s, pos_tags) for s, pos_tags in zip(segments, pos_sents)
+        ],
+    }
+
+
+def read_file(filename, pos_model='pos.model'):
+    with open(filename, 'rb') as f:
+        sentences = [line.decode('utf8') for line in f]
+    return read_lines(sentences, file_label(filename), pos_model)
+
+
+def iter_texts(filename):
+    label = file_label(filename)
+    with open(filename, 'rb') as f:
+        for line in f:
+            yield clean_text(split_segments(line.decode('utf8'))), label
+
+
+def iter_file(filename, pos_model='pos.model', chunk_size=1000, select=None):
+    label = file_label(filename)
+    with open(filename, 'rb') as f:
+        while True:
+            lines = [line.decode('utf8') for line in islice(f, chunk_size)]
+            if not lines:
+                break
+            if select is not None:  # only POS tag the sentences asked for
+                lines = [
+                    line for line in lines
+                    if select(clean_text(split_segments(line)))
+                ]
+            data = read_lines(lines, label, pos_model)
+            for text, iob in zip(data['sents'], data['iob_sents']):
+                yield text, label, iob
+
+
+def _read_file(args):
+    return read_file(*args)
+
 
 class IOBReader(object):
 
@@ -19,13 +148,85 @@ class IOBReader(object):
         self.dirname = join(kwargs.pop('dirname', 'data/iob'), '*.iob')
         self.test_size = kwargs.pop('test_size', 0.2)
         self.random_state = kwargs.pop('random_state', 42)
-        self.read()
+        self.pos_model = kwargs.pop('pos_model', 'pos.model')
+        self.processes = kwargs.pop('processes', None)
+        self.cache_dir = kwargs.pop('cache_dir', None)
+        self.stream = kwargs.pop('stream', False)
+        self.chunk_size = kwargs.pop('chunk_size', 1000)
+        self._chunked_sents = None
+        if not self.stream:
+            self.read()
         super().__init__(*args, **kwargs)
 
-    def pop_pos(self, pos_tags, word):
-        for i, (w, pos) in enumerate(pos_tags):
-            if word == w:
-                return pos_tags.pop(i)[1]
+    def cache_file(self, filename):
+        digest = hashlib.sha1(repr((
+            CACHE_VERSION, model_path(self.pos_model),
+            registry.stamp(model_path(self.pos_model))
+        )).encode('utf8'))
+        with open(filename, 'rb') as f:
+            digest.update(f.read())
+        return join(self.cache_dir, '%s.json' % digest.hexdigest())
+
+    def iter_cached(self, filename):
+        with open(self.cache_file(filename)) as f:
+            for line in f:
+                text, label, iob = json.loads(line)
+                yield text, label, [tuple(x) for x in iob]
+
+    def load_cached(self, filename):
+        if not os.path.isfile(self.cache_file(filename)):
+            return None
+        data = {'sents': [], 'feature_set': [], 'iob_sents': []}
+        for text, label, iob in self.iter_cached(filename):
+            data['sents'].append(text)
+            data['feature_set'].append((text, label))
+            data['iob_sents'].append(iob)
+        return data
+
+    def write_cached(self, filename, sents):
+        # sentences are passed through as they are written, so a streamed
+        # file is cached by the same pass that tags it
+        cache_file = self.cache_file(filename)
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        partial = '%s.%s.tmp' % (cache_file, os.getpid())
+        try:
+            with open(partial, 'w') as f:
+                for sent in sents:
+                    f.write(json.dumps(sent) + '\n')
+                    yield sent
+            os.replace(partial, cache_file)
+        finally:
+            if os.path.isfile(partial):
+                os.remove(partial)
+
+    def save_cached(self, filename, data):
+        for _ in self.write_cached(filename, zip(
+            data['sents'],
+            [label for _, label in data['feature_set']],
+            data['iob_sents']
+        )):
+            pass
+
+    def read_files(self, filenames):
+        results = {}
+        if self.cache_dir:
+            for filename in filenames:
+                cached = self.load_cached(filename)
+                if cached is not None:
+                    results[filename] = cached
+        missing = [f for f in filenames if f not in results]
+        args = [(f, self.pos_model) for f in missing]
+        if self.processes and len(missing) > 1:
+            with Pool(self.processes) as pool:
+                parsed = pool.map(_read_file, args)
+        else:
+            parsed = [_read_file(a) for a in args]
+        for filename, data in zip(missing, parsed):
+            if self.cache_dir:
+                self.save_cached(filename, data)
+            results[filename] = data
+        return [results[filename] for filename in filenames]
 
     def read(self):
         self.iob_sents = []
@@ -35,48 +236,10 @@ class IOBReader(object):
         self.test_set = []
         self.iob_train = []
         self.iob_test = []
-        for filename in glob(self.dirname):
-            file_feature_set = []
-            file_iob_sents = []
-            with open(filename, 'rb') as f:
-                tags_re = r'\[(.*?)\]'
-                tags_sub = r'\[[A-Z]+\s|\]'
-                for sentence in f:
-                    sentence = sentence.decode('utf8')
-                    text = re.sub(tags_sub, '', sentence).strip('\n').strip()
-                    self.sents.append(text)
-                    file_feature_set.append(
-                        (text, splitext(basename(filename))[0])
-                    )
-
-                    pos_tags = pos_tag(text)[0]
-                    tags = []
-                    for tag in re.findall(tags_re, sentence):
-                        tag, value = tag.split(' ', 1)
-                        words = word_tokenize(value)
-                        first = [(
-                            words[0], self.pop_pos(pos_tags, words[0]),
-                            'B-%s' % tag
-                        )]
-                        tags.append(
-                            first + [(
-                                w, self.pop_pos(pos_tags, w), 'I-%s' % tag
-                            ) for w in words[1:]]
-                        )
-                    itags = iter(tags)
-                    text_list = re.sub(tags_re, '[NE]', sentence).split('[NE]')
-                    iob = []
-                    for part in text_list:
-                        tagged_part = [
-                            (w, self.pop_pos(pos_tags, w), 'O')
-                            for w in word_tokenize(part)
-                        ]
-                        try:
-                            ne = next(itags)
-                            iob += tagged_part + ne
-                        except StopIteration:
-                            iob += tagged_part
-                    file_iob_sents.append(iob)
+        for data in self.read_files(glob(self.dirname)):
+            file_feature_set = data['feature_set']
+            file_iob_sents = data['iob_sents']
+            self.sents.extend(data['sents'])
             self.feature_set.extend(file_feature_set)
             self.iob_sents.extend(file_iob_sents)
             file_iob_train, file_iob_test = train_test_split(
@@ -93,13 +256,84 @@ class IOBReader(object):
             self.iob_test.extend(file_iob_test)
             self.train_set.extend(file_train_set)
             self.test_set.extend(file_test_set)
+        self._chunked_sents = None
+
+    @property
+    def chunked_sents(self):
+        if self._chunked_sents is None:
+            self._chunked_sents = list(self.iter_chunked_sents())
+        return self._chunked_sents
+
+    def is_test(self, text):
+        digest = hashlib.sha1(
+            ('%s:%s' % (self.random_state, text)).encode('utf8')
+        ).digest()
+        return int.from_bytes(digest[:8], 'big') / 2.0 ** 64 < self.test_size
+
+    def iter_sents(self, select=None):
+        if not self.stream:
+            for text, (_, label), iob in zip(
+                self.sents, self.feature_set, self.iob_sents
+            ):
+                yield text, label, iob
+            return
+        for filename in glob(self.dirname):
+            if not self.cache_dir:
+                yield from iter_file(
+                    filename, self.pos_model, self.chunk_size, select
+                )
+            elif os.path.isfile(self.cache_file(filename)):
+                yield from self.iter_cached(filename)
+            else:
+                yield from self.write_cached(filename, iter_file(
+                    filename, self.pos_model, self.chunk_size
+                ))
 
-        self.chunked_sents = [
-            conlltags2tree(x)
-            for x in self.iob_sents
-        ]
+    def _iter_split(self, test, iob):
+        if not self.stream:
+            # eager readers already hold their train_test_split results
+            return iter(getattr(self, SPLITS[test, iob]))
+        if iob:
+            return self._iter_iob_split(test)
+        return self._iter_text_split(test)
+
+    def _iter_text_split(self, test):
+        # plain (text, label) pairs need no POS tagging at all
+        for filename in glob(self.dirname):
+            for text, label in iter_texts(filename):
+                if self.is_test(text) == test:
+                    yield text, label
+
+    def _iter_iob_split(self, test):
+
+        def select(text):
+            return self.is_test(text) == test
+
+        for text, _, iob in self.iter_sents(select):
+            if select(text):
+                yield [((w, p), i) for w, p, i in iob]
+
+    def iter_train_set(self):
+        return self._iter_split(test=False, iob=False)
+
+    def iter_test_set(self):
+        return self._iter_split(test=True, iob=False)
+
+    def iter_iob_train(self):
+        return self._iter_split(test=False, iob=True)
+
+    def iter_iob_test(self):
+        return self._iter_split(test=True, iob=True)
+
+    def iter_chunked_sents(self):
+        for _, _, iob in self.iter_sents():
+            yield conlltags2tree(iob)
 
     def __repr__(self):
+        if self.stream:
+            return '%s(dirname=\'%s\', stream=True)' % (
+                self.__class__.__name__, self.dirname
+            )
         return '%s(sents=%s)' % (
             self.__class__.__name__, len(self.iob_sents)
         )
@@ -0,0 +1,194 @@
+from collections.abc import Sequence
+from os.path import join
+import json
+import numpy as np
+import os
+import pickle
+import sys
+
+__all__ = [
+    'save_state', 'load_state', 'is_state_dir', 'TextArray', 'CsrCorpus',
+    'convert'
+]
+
+META_FILE = 'meta.json'
+FORMAT_VERSION = 1
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(
+        'Object of type %s cannot be stored in %s' % (
+            value.__class__.__name__, META_FILE
+        )
+    )
+
+
+def is_state_dir(path):
+    return os.path.isfile(join(path, META_FILE))
+
+
+def _replace(filename, mode, write):
+    # a new inode for every file, so processes still mapping the old one
+    # keep reading it instead of hitting a truncated file
+    partial = '%s.%s.tmp' % (filename, os.getpid())
+    try:
+        with open(partial, mode) as f:
+            write(f)
+        os.replace(partial, filename)
+    finally:
+        if os.path.isfile(partial):
+            os.remove(partial)
+
+
+def save_state(path, state):
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    arrays = []
+    meta = {}
+    for key, value in state.items():
+        if isinstance(value, np.ndarray):
+            _replace(
+                join(path, '%s.npy' % key), 'wb',
+                lambda f: np.save(f, value, allow_pickle=False)
+            )
+            arrays.append(key)
+        else:
+            meta[key] = value
+    _replace(join(path, META_FILE), 'w', lambda f: json.dump({
+        'version': FORMAT_VERSION,
+        'arrays': arrays,
+        'state': meta
+    }, f, default=_json_default))
+    return path
+
+
+def load_state(path, mmap_mode='r'):
+    with open(join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta['version'] > FORMAT_VERSION:
+        raise ValueError(
+            'Unsupported model format version: %s' % meta['version']
+        )
+    state = meta['state']
+    for key in meta['arrays']:
+        state[key] = np.load(
+            join(path, '%s.npy' % key),
+            mmap_mode=mmap_mode, allow_pickle=False
+        )
+    return state
+
+
+class TextArray(Sequence):
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_list(cls, texts):
+        encoded = [text.encode('utf8') for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(x) for x in encoded], out=offsets[1:])
+        return cls(
+            np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+        )
+
+    def append(self, texts):
+        extra = self.from_list(list(texts))
+        return self.__class__(
+            np.concatenate([self.data, extra.data]),
+            np.concatenate([
+                self.offsets, extra.offsets[1:] + self.offsets[-1]
+            ])
+        )
+
+    def take(self, indices):
+        return self.from_list([self[i] for i in indices])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[x] for x in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.data[start:end].tobytes().decode('utf8')
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __repr__(self):
+        return '%s(texts=%s)' % (self.__class__.__name__, len(self))
+
+
+class CsrCorpus(Sequence):
+
+    def __init__(self, indptr, indices, data):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        indptr = [0]
+        indices = []
+        data = []
+        for doc in corpus:
+            indices.extend(i for i, _ in doc)
+            data.extend(v for _, v in doc)
+            indptr.append(len(indices))
+        return cls(
+            np.asarray(indptr, dtype=np.int64),
+            np.asarray(indices, dtype=np.int64),
+            np.asarray(data)
+        )
+
+    def append(self, corpus):
+        extra = self.from_corpus(corpus)
+        return self.__class__(
+            np.concatenate([self.indptr, extra.indptr[1:] + self.indptr[-1]]),
+            np.concatenate([self.indices, extra.indices]),
+            np.concatenate([self.data, extra.data]).astype(
+                self.data.dtype, copy=False
+            )
+        )
+
+    def take(self, indices):
+        return self.from_corpus([self[i] for i in indices])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[x] for x in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return list(zip(
+            self.indices[start:end].tolist(),
+            self.data[start:end].tolist()
+        ))
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __repr__(self):
+        return '%s(documents=%s)' % (self.__class__.__name__, len(self))
+
+
+def convert(src, dst):
+    with open(src, 'rb') as f:
+        instance = pickle.load(f)
+    instance.export(dst)
+    return instance
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: python -m eva.utils.storage <model> <directory>')
+    print(convert(*sys.argv[1:]))
@@ -1,26 +1,59 @@
-import regex as re
+from functools import lru_cache
+import re
 import unicodedata
 
 
-__all__ = ['normalize_ascii', 'regex_tokenize', 'extract_text']
+__all__ = [
+    'normalize_ascii', 'regex_tokenize', 'extract_text',
+    'batch_normalize_ascii', 'batch_regex_tokenize'
+]
+
+# whitespace without \x1c-\x1f, which the regex module never treated as \s
+SPLIT_RE = re.compile(r'[?\-_.,!()]|[^\S\x1c-\x1f]')
+
+
+class AsciiTable(dict):
+
+    def __missing__(self, key):
+        # folding char by char is equivalent to folding the whole string:
+        # NFKD only reorders combining marks, and those are never ASCII
+        value = self[key] = unicodedata.normalize('NFKD', chr(key))\
+            .encode('ascii', 'ignore').decode('ascii')
+        return value
+
+
+ascii_table = AsciiTable((i, i) for i in range(128))
+
+
+@lru_cache(maxsize=100000)
+def fold_ascii(value):
+    try:
+        value.encode('ascii')
+        return value
+    except UnicodeEncodeError:
+        return value.translate(ascii_table)
 
 
 def normalize_ascii(value):
     try:
-        return unicodedata.normalize('NFKD', str(value))\
-            .encode('ascii', 'ignore').decode('ascii')
-    except:
+        return fold_ascii(str(value))
+    except Exception:
         return value
 
 
+def batch_normalize_ascii(values):
+    return [normalize_ascii(value) for value in values]
+
+
 def regex_tokenize(sentence):
-    return list(filter(None, map(
-        normalize_ascii,
-        re.split(
-            r'\s|\t|\n|\r|\?|\-|\_|\.|\,|\!|\(|\)',
-            sentence
-        )
-    )))
+    return [
+        token for token in map(fold_ascii, SPLIT_RE.split(sentence))
+        if token
+    ]
+
+
+def batch_regex_tokenize(sentences):
+    return [regex_tokenize(sentence) for sentence in sentences]
 
 
 def extract_text(entities, entity_type):
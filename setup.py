@@ -23,6 +23,12 @@ setup(
         'boltons==17.1.0',
         'requests==2.18.1'
     ],
+    extras_require={
+        'fast': ['rapidfuzz'],
+    },
+    entry_points={
+        'console_scripts': ['eva-parse=eva.bulk:main'],
+    },
     zip_safe=False,
     version=version,
     description='Chatbot EVA',